@@ -1,27 +1,50 @@
 from fastapi import FastAPI, HTTPException, Query, Form, Request
+from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
-import weaviate
+from pydantic import BaseModel, Field
 import os
-from typing import Dict, Optional, List, Any, Tuple
-from pathlib import Path
-from openai import OpenAI
 import httpx
+from typing import AsyncIterator, Dict, Literal, Optional, List, Any, Tuple
+from pathlib import Path
 from src.utils.document_processor import DocumentProcessor, Category
+from src.utils.weaviate_repository import AsyncWeaviateRepository, WeaviateError
+from src.utils.llm_client import LLMClient
+from src.utils.cache import TTLCache, normalize_query
+from src.utils.embeddings import CachedEmbedder, OpenAIEmbedder
+from src.utils.synonyms import Expansion, SynonymEngine, DEFAULT_SYNONYMS_PATH
+from src.utils.fusion import FUSION_METHODS
+from src.utils.bm25_index import BM25Index, filters_from_where
+from src.utils.reranker import build_reranker
+from src.utils.mmr import apply_mmr
+from src.utils.context_packer import ContextPacker, TokenCounter
+from src.utils.chat_history import ChatHistoryManager, fingerprint
+from src.utils.sessions import Session, SessionStore, is_follow_up, query_similarity
+from src.utils.singleflight import SingleFlight
+from src.utils.batcher import GraphQLBatcher
+from src.utils.autocut import autocut, autocut_fused, confidence, is_clustered
+from src.utils.partitions import SUPPORT_DOCS_PROPERTIES, PartitionRouter, support_docs_class
+from src.utils.category_router import CategoryRouter
+from src.utils.log_config import configure_logging, log_payload, logging_stats
+from src.utils.tracing import RequestIdFilter, Trace, TraceExporter, span, start_trace, traced
+from src.utils.metrics import RequestMetrics, StatsCollector
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from src.utils.doc_metadata import METADATA_FIELDS, metadata_filter, metadata_properties, source_id
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 import re
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import json
 from datetime import datetime
+import hashlib
 import numpy as np
 import logging
+import asyncio
+import time
 from pydantic_settings import BaseSettings
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Add settings class
@@ -30,37 +53,435 @@ class Settings(BaseSettings):
     WEAVIATE_URL: str = "http://weaviate:8080"
     MODEL_NAME: str = "gpt-3.5-turbo"
     COLLECTION_NAME: str = "SupportDocs"
+    STORAGE_MODE: str = "shared"  # "shared" or "class" (one class per category)
     MAX_CONTEXT_DOCS: int = 3
     TEMPERATURE: float = 0.7
     MAX_TOKENS: int = 300
 
+    # Weaviate connection pool
+    WEAVIATE_MAX_CONNECTIONS: int = 20
+    WEAVIATE_MAX_KEEPALIVE: int = 10
+    WEAVIATE_KEEPALIVE_EXPIRY: float = 30.0
+    WEAVIATE_TIMEOUT: float = 30.0
+    WEAVIATE_STARTUP_PERIOD: int = 30
+
+    # OpenAI connection pool
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0
+    OPENAI_TIMEOUT: float = 60.0
+
+    # Retrieval cache
+    RETRIEVAL_CACHE_SIZE: int = 512
+    RETRIEVAL_CACHE_TTL: float = 600.0
+
+    # Answer cache for /search/
+    ANSWER_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_TTL: float = 3600.0
+
+    # Query embeddings (near_vector instead of near_text)
+    QUERY_EMBEDDINGS: bool = True
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: Optional[str] = None
+    EMBEDDING_TIMEOUT: float = 1.0  # then near_text (or no routing / context reuse)
+
+    # Synonym expansion
+    SYNONYMS_PATH: str = str(DEFAULT_SYNONYMS_PATH)
+    SYNONYM_MAX_EXPANSIONS: int = 6
+
+    # Retrieval mode: "vector" or "hybrid" (BM25 + vector with rank fusion)
+    RETRIEVAL_MODE: str = "hybrid"
+    HYBRID_ALPHA: float = 0.5
+    HYBRID_FUSION: str = "rrf"
+
+    # Local BM25 fallback when Weaviate misses its deadline
+    LOCAL_INDEX_ENABLED: bool = True
+    RETRIEVAL_DEADLINE: float = 2.0
+
+    # Reranking: "feature", "onnx" or "none"
+    RERANKER: str = "feature"
+    RERANK_CANDIDATES: int = 30
+    RERANK_MODEL_PATH: Optional[str] = None
+    RERANK_TOKENIZER_PATH: Optional[str] = None
+
+    # Maximal marginal relevance over the reranked candidates
+    MMR_ENABLED: bool = True
+    MMR_LAMBDA: float = 0.7
+    MMR_K: Optional[int] = None  # defaults to MAX_CONTEXT_DOCS
+
+    # Prompt context budget, in tokens of MODEL_NAME
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_MIN_CHUNK_TOKENS: int = 32
+
+    # Chat history: recent turns verbatim, older turns summarised per user
+    HISTORY_KEEP_TURNS: int = 4
+    HISTORY_TOKEN_BUDGET: int = 1000
+    HISTORY_SUMMARY_MAX_TOKENS: int = 200
+    HISTORY_CACHE_SIZE: int = 1000
+    HISTORY_CACHE_TTL: float = 3600.0
+
+    # Server-side chat sessions
+    SESSION_MAX: int = 10000
+    SESSION_IDLE_TTL: float = 1800.0
+    SESSION_MAX_MESSAGES: int = 100
+    SESSION_DB_PATH: Optional[str] = None
+    SESSION_REUSE_CONTEXT: bool = True
+    FOLLOW_UP_MAX_WORDS: int = 8
+    FOLLOW_UP_SIMILARITY: float = 0.9
+
+    # Micro-batching of concurrent retrieval queries into one GraphQL request
+    GRAPHQL_BATCH_ENABLED: bool = True
+    GRAPHQL_BATCH_WINDOW_MS: float = 3.0
+    GRAPHQL_BATCH_MAX: int = 16
+
+    # Distance autocut and adaptive depth for vector hits
+    AUTOCUT_ENABLED: bool = True
+    AUTOCUT_MAX_DISTANCE: float = 0.35
+    AUTOCUT_MIN_GAP: float = 0.05
+    AUTOCUT_CLUSTER_SPREAD: float = 0.02
+    AUTOCUT_MAX_DEPTH: int = 100
+
+    # Automatic category routing for /api/chat from per-category centroids
+    CATEGORY_ROUTER_ENABLED: bool = True
+    CATEGORY_ROUTER_MAX: int = 2
+    CATEGORY_ROUTER_MARGIN: float = 0.02
+    CATEGORY_ROUTER_REFRESH_DELAY: float = 10.0
+
+    # Logging: bounded queue drained off the event loop, per-module levels
+    # (e.g. "httpx=WARNING,src.utils.batcher=DEBUG") and sampled, truncated payloads
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = "httpx=WARNING"
+    LOG_FORMAT: str = "text"  # "text" or "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+    LOG_PAYLOAD_MAX_CHARS: int = 2000
+
+    # Per-stage tracing: Server-Timing headers, optional OTLP/JSON export
+    # ("console" or a file path)
+    TRACING_ENABLED: bool = True
+    TRACE_EXPORTER: Optional[str] = None
+    TRACE_EXPORT_SAMPLE_RATE: float = 1.0
+
+    # Prometheus /metrics
+    METRICS_ENABLED: bool = True
+
+    # /search/batch
+    BATCH_MAX_QUERIES: int = 5000
+    BATCH_CONCURRENCY: int = 8
+
     class Config:
         env_file = ".env"
 
 # Initialize settings
 settings = Settings()
 
+# Set up logging
+configure_logging(
+    level=settings.LOG_LEVEL,
+    module_levels=settings.LOG_LEVELS,
+    fmt=settings.LOG_FORMAT,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    payload_sample_rate=settings.LOG_PAYLOAD_SAMPLE_RATE,
+    payload_max_chars=settings.LOG_PAYLOAD_MAX_CHARS,
+    filters=[RequestIdFilter()],
+)
+
+# Prometheus metrics: request/stage histograms recorded per request, component
+# counters read from their stats() at scrape time
+metrics_registry = CollectorRegistry()
+request_metrics = RequestMetrics(metrics_registry) if settings.METRICS_ENABLED else None
+
+# Finished request traces go here when TRACE_EXPORTER is set
+trace_exporter = TraceExporter(
+    settings.TRACE_EXPORTER,
+    sample_rate=settings.TRACE_EXPORT_SAMPLE_RATE,
+) if settings.TRACE_EXPORTER else None
+
+# Single pooled, non-blocking Weaviate repository shared by every request handler
+weaviate_repo = AsyncWeaviateRepository(
+    url=settings.WEAVIATE_URL,
+    headers={"X-OpenAI-Api-Key": settings.OPENAI_API_KEY},
+    max_connections=settings.WEAVIATE_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.WEAVIATE_MAX_KEEPALIVE,
+    keepalive_expiry=settings.WEAVIATE_KEEPALIVE_EXPIRY,
+    timeout=settings.WEAVIATE_TIMEOUT,
+)
+
+# Concurrent searches share GraphQL round trips
+graphql_batcher = GraphQLBatcher(
+    weaviate_repo,
+    window_ms=settings.GRAPHQL_BATCH_WINDOW_MS,
+    max_batch=settings.GRAPHQL_BATCH_MAX,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect shared clients on startup and release them on shutdown"""
+    await weaviate_repo.connect(startup_period=settings.WEAVIATE_STARTUP_PERIOD)
+    embedder.load()
+    await sync_schema()
+    if settings.LOCAL_INDEX_ENABLED:
+        await rebuild_local_index()
+    if settings.CATEGORY_ROUTER_ENABLED:
+        await build_category_router()
+    session_store.prune()
+    yield
+    embedder.save()
+    await weaviate_repo.close()
+    await llm_client.close()
+    if trace_exporter:
+        trace_exporter.close()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Initialize OpenAI client
-openai_client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    http_client=httpx.Client()
+# Initialize async OpenAI client on a shared connection pool
+llm_client = LLMClient(
+    api_key=settings.OPENAI_API_KEY,
+    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+    timeout=settings.OPENAI_TIMEOUT,
 )
 
-# Initialize Weaviate client
-client = weaviate.Client(
-    url="http://weaviate:8080",  # Use Docker service name
-    additional_headers={
-        "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
-    }
+# Query embedder sharing the OpenAI connection pool, with an LRU of vectors
+embedder = CachedEmbedder(
+    OpenAIEmbedder(llm_client.client, model=settings.EMBEDDING_MODEL),
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    cache_path=settings.EMBEDDING_CACHE_PATH,
 )
 
-# Print configuration
-print("=== App Configuration ===")
-print(f"OpenAI API Key present: {'YES' if os.getenv('OPENAI_API_KEY') else 'NO'}")
-print(f"Weaviate URL: {os.getenv('WEAVIATE_URL', 'http://weaviate:8080')}")
+# Synonym/phrase expansion automaton, compiled once at import
+synonym_engine = SynonymEngine.from_file(
+    settings.SYNONYMS_PATH,
+    max_expansions=settings.SYNONYM_MAX_EXPANSIONS,
+)
+
+# Cache of get_relevant_context results, keyed on the corpus version so a
+# lookup that started before a write can't store pre-write results under a
+# key later lookups will use
+retrieval_cache = TTLCache(
+    max_entries=settings.RETRIEVAL_CACHE_SIZE,
+    ttl_seconds=settings.RETRIEVAL_CACHE_TTL,
+)
+corpus_version = 0
+
+# Cache of full /search/ answers; keyed on the retrieved context so corpus
+# changes naturally produce new keys
+answer_cache = TTLCache(
+    max_entries=settings.ANSWER_CACHE_SIZE,
+    ttl_seconds=settings.ANSWER_CACHE_TTL,
+)
+
+# Reranker applied between retrieval and prompt assembly
+reranker = build_reranker(
+    settings.RERANKER,
+    model_path=settings.RERANK_MODEL_PATH,
+    tokenizer_path=settings.RERANK_TOKENIZER_PATH,
+)
+
+# Identical concurrent searches and completions share one in-flight call
+retrieval_flight = SingleFlight()
+generation_flight = SingleFlight()
+
+# Local inverted index mirroring SupportDocs, kept in sync by the write handlers
+local_index = BM25Index()
+local_fallbacks = 0
+retrieval_deadline_misses = 0
+
+async def rebuild_local_index():
+    """Load every chunk from Weaviate into the local BM25 index"""
+    try:
+        local_index.clear()
+        for class_name in partition_router.classes():
+            async for doc in weaviate_repo.iterate(class_name, ["content", "metadata", "category", "originalMetadata", "tokenCount", *METADATA_FIELDS.values(), "sourceId"]):
+                local_index.add(doc["_additional"]["id"], doc)
+        logger.info(f"Built local BM25 index over {len(local_index)} chunks")
+    except Exception as e:
+        logger.warning(f"Could not build local BM25 index: {e}")
+
+# Category -> class routing; "class" mode gives every category its own index
+partition_router = PartitionRouter(
+    settings.COLLECTION_NAME,
+    mode=settings.STORAGE_MODE,
+    categories=[category.value for category in Category],
+)
+
+# Picks the categories a chat message is about; centroids are rebuilt after writes
+category_router = CategoryRouter(
+    max_categories=settings.CATEGORY_ROUTER_MAX,
+    margin=settings.CATEGORY_ROUTER_MARGIN,
+)
+_category_router_refresh: Optional[asyncio.Task] = None
+
+# Shared tokenizer and prompt packer; chunk token counts are stored at ingest
+token_counter = TokenCounter(settings.MODEL_NAME)
+context_packer = ContextPacker(
+    token_counter,
+    budget=settings.CONTEXT_TOKEN_BUDGET,
+    min_chunk_tokens=settings.CONTEXT_MIN_CHUNK_TOKENS,
+)
+
+# Bounded chat history with rolling summaries cached per user_id
+history_manager = ChatHistoryManager(
+    llm_client,
+    token_counter,
+    model=settings.MODEL_NAME,
+    keep_turns=settings.HISTORY_KEEP_TURNS,
+    token_budget=settings.HISTORY_TOKEN_BUDGET,
+    summary_max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+    cache_size=settings.HISTORY_CACHE_SIZE,
+    cache_ttl=settings.HISTORY_CACHE_TTL,
+)
+
+# Chat sessions so clients only send the new message
+session_store = SessionStore(
+    max_sessions=settings.SESSION_MAX,
+    idle_ttl=settings.SESSION_IDLE_TTL,
+    max_messages=settings.SESSION_MAX_MESSAGES,
+    db_path=settings.SESSION_DB_PATH,
+)
+
+def with_derived_fields(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the chunk's tokenCount, typed metadata fields and sourceId before it is written to Weaviate"""
+    properties["tokenCount"] = token_counter.count(properties.get("content") or "")
+    if not any(properties.get(prop) for prop in METADATA_FIELDS.values()):
+        properties.update(metadata_properties(properties.get("metadata")))
+    properties["sourceId"] = source_id(
+        properties.get("category"),
+        properties.get("originalMetadata") or properties.get("metadata")
+    )
+    return properties
+
+async def sync_schema():
+    """Discover partition classes and add missing properties (e.g. tokenCount) so queries can select them"""
+    try:
+        schema = await weaviate_repo.get_schema()
+        partition_router.discover(schema)
+        classes = set(partition_router.classes())
+        for class_obj in schema.get("classes") or []:
+            if class_obj["class"] not in classes:
+                continue
+            existing = {p["name"] for p in class_obj.get("properties") or []}
+            for property_obj in SUPPORT_DOCS_PROPERTIES:
+                if property_obj["name"] not in existing:
+                    await weaviate_repo.add_property(class_obj["class"], dict(property_obj))
+                    logger.info(f"Added {property_obj['name']} property to {class_obj['class']}; run /cleanup-data to backfill")
+    except Exception as e:
+        logger.warning(f"Could not sync SupportDocs schema: {e}")
+
+async def ensure_partition(category: Optional[str]) -> str:
+    """Class to write `category` to, creating its partition class on first use"""
+    class_name = partition_router.class_for(category)
+    if not partition_router.exists(class_name):
+        try:
+            await weaviate_repo.create_class(partition_router.class_schema(category))
+            logger.info(f"Created partition class {class_name} for category {category}")
+        except WeaviateError as e:
+            if "already exists" not in str(e):
+                raise
+        partition_router.mark_created(category)
+    return class_name
+
+async def recreate_collections():
+    """Drop every SupportDocs class and create empty ones with the current schema"""
+    for class_name in set(partition_router.classes()) | {settings.COLLECTION_NAME}:
+        try:
+            await weaviate_repo.delete_class(class_name)
+            logger.info(f"Deleted existing {class_name} class")
+        except Exception as e:
+            logger.warning(f"Error deleting class {class_name}: {e}")
+    local_index.clear()
+    partition_router.forget()
+    
+    if partition_router.partitioned:
+        for category in list(partition_router.categories):
+            await ensure_partition(category)
+    else:
+        await weaviate_repo.create_class(support_docs_class(settings.COLLECTION_NAME))
+    logger.info(f"Created new {', '.join(partition_router.classes())} class(es)")
+
+async def fetch_all(properties: List[str]) -> Dict[str, List[Dict]]:
+    """Get every class's documents (up to Weaviate's default limit) in one request"""
+    classes = partition_router.classes()
+    results = await weaviate_repo.get_many([
+        {"class_name": class_name, "properties": properties, "additional": ["id"]}
+        for class_name in classes
+    ])
+    return dict(zip(classes, results))
+
+if request_metrics:
+    metrics_registry.register(StatsCollector(
+        llm=llm_client.stats,
+        weaviate=weaviate_repo.request_stats,
+        pool=weaviate_repo.pool_stats,
+        caches={
+            "retrieval": retrieval_cache.stats,
+            "answer": answer_cache.stats,
+            "embeddings": embedder.stats,
+        },
+        flights={"retrieval": retrieval_flight.stats, "generation": generation_flight.stats},
+        batcher=graphql_batcher.stats,
+        counters=lambda: {
+            "rag_local_fallbacks": local_fallbacks,
+            "rag_retrieval_deadline_misses": retrieval_deadline_misses,
+            "rag_sessions": session_store.created,
+            "rag_session_context_reuses": session_store.context_reuses,
+            "log_records_dropped": logging_stats()["dropped"],
+        },
+    ))
+
+def invalidate_corpus_caches():
+    """Forget cached retrieval results after any write to SupportDocs"""
+    global corpus_version
+    corpus_version += 1
+    retrieval_cache.invalidate()
+    schedule_category_router_refresh()
+
+async def build_category_router():
+    """Compute per-category centroids from the stored chunk vectors"""
+    try:
+        pairs = []
+        for class_name in partition_router.classes():
+            async for doc in weaviate_repo.iterate(class_name, ["category"], additional=["id", "vector"]):
+                pairs.append((doc.get("category"), doc["_additional"].get("vector")))
+        category_router.fit(pairs)
+        logger.info(f"Built category router over {len(pairs)} chunks: {category_router.stats()['categories']}")
+    except Exception as e:
+        logger.warning(f"Could not build category router: {e}")
+
+def schedule_category_router_refresh():
+    """Rebuild the centroids once a burst of writes has settled"""
+    global _category_router_refresh
+    if not settings.CATEGORY_ROUTER_ENABLED:
+        return
+    if _category_router_refresh is not None and not _category_router_refresh.done():
+        return
+    
+    async def refresh():
+        await asyncio.sleep(settings.CATEGORY_ROUTER_REFRESH_DELAY)
+        await build_category_router()
+    _category_router_refresh = asyncio.ensure_future(refresh())
+
+async def route_categories(expansion: Expansion) -> Optional[List[str]]:
+    """Categories an expanded query is most likely about, or None to search them all"""
+    # Routing needs the query vector; without in-app embeddings every category is searched
+    if not settings.CATEGORY_ROUTER_ENABLED or not settings.QUERY_EMBEDDINGS or not category_router.ready:
+        return None
+    try:
+        # Same concepts as the retrieval itself, so the search reuses the cached embedding
+        with span("route"):
+            vector = await embed_query(expansion.terms)
+            route = category_router.route(vector)
+    except Exception as e:
+        logger.warning(f"Category routing failed, searching all categories: {e}")
+        return None
+    logger.debug("Routed query to %s in %.0fus", route.categories, route.elapsed_us)
+    return route.categories
+
+# Log configuration
+logger.info(f"App configuration: OpenAI API key present: {'YES' if os.getenv('OPENAI_API_KEY') else 'NO'}, Weaviate URL: {settings.WEAVIATE_URL}")
 
 # Create and mount static directory
 static_dir = Path(__file__).parent.parent / "static"
@@ -68,6 +489,75 @@ if not static_dir.exists():
     static_dir.mkdir(parents=True)
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace each request's stages and report them in Server-Timing and X-Request-ID headers
+
+    With TRACING_ENABLED off, requests are still traced (without headers or
+    export) while metrics are on, to feed the per-stage histograms.
+    """
+    if not settings.TRACING_ENABLED and not request_metrics:
+        return await call_next(request)
+    trace = start_trace(f"{request.method} {request.url.path}", (request.headers.get("x-request-id") or "")[:128] or None)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        finish_trace(trace)
+        raise
+    # Headers go out before a streamed body, so Server-Timing covers up to the
+    # first byte; the exported trace and stage metrics cover the whole body
+    if settings.TRACING_ENABLED:
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Request-ID"] = trace.request_id
+    response.body_iterator = _trace_body(response.body_iterator, trace)
+    return response
+
+async def _trace_body(body: AsyncIterator, trace: Trace) -> AsyncIterator:
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        finish_trace(trace)
+
+def finish_trace(trace: Trace) -> None:
+    trace.end_ns = time.time_ns()
+    if trace_exporter and settings.TRACING_ENABLED:
+        trace_exporter.export(trace)
+    if request_metrics:
+        request_metrics.observe_trace(trace)
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Count requests and time them per route template (so ids in paths don't explode label sets)"""
+    if not request_metrics or request.url.path == "/metrics":
+        return await call_next(request)
+    route = "unmatched"
+    for candidate in app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match != Match.NONE:
+            # PARTIAL is a path match with the wrong method (405)
+            route = getattr(candidate, "path", route)
+            if match == Match.FULL:
+                break
+
+    status = 500
+    start = time.perf_counter()
+    request_metrics.in_flight.labels(route).inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        request_metrics.in_flight.labels(route).dec()
+        request_metrics.observe(request.method, route, status, time.perf_counter() - start)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    if not request_metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(generate_latest(metrics_registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
 # Initialize templates
 templates = Jinja2Templates(directory="templates")
 
@@ -80,65 +570,249 @@ class Document(BaseModel):
 async def root():
     return FileResponse('src/static/index.html')
 
-async def get_relevant_context(query: str, category: str) -> Dict:
-    """Get relevant context from Weaviate"""
+async def embed_query(concepts: List[str]) -> List[float]:
+    """Query embedding, or asyncio.TimeoutError after EMBEDDING_TIMEOUT
+
+    OpenAI calls may take OPENAI_TIMEOUT plus retries, far past any retrieval
+    deadline, so query-path embeddings give up early instead.
+    """
+    return await asyncio.wait_for(embedder.embed_query(concepts), timeout=settings.EMBEDDING_TIMEOUT)
+
+async def vector_search_args(concepts: List[str]) -> Dict:
+    """Search arguments for the given concepts, embedded locally when enabled"""
+    if settings.QUERY_EMBEDDINGS:
+        try:
+            with span("embed"):
+                return {"near_vector": {"vector": await embed_query(concepts)}}
+        except Exception as e:
+            logger.warning(f"Query embedding failed ({type(e).__name__}), falling back to near_text: {e}")
+    return {"near_text": {"concepts": concepts}}
+
+async def search_documents(
+    query: str,
+    properties: List[str],
+    concepts: Optional[List[str]] = None,
+    where: Optional[Dict] = None,
+    limit: int = 5,
+    mode: Optional[str] = None,
+    alpha: Optional[float] = None,
+    fusion: Optional[str] = None,
+    rerank: bool = True,
+    diversify: bool = False,
+    categories: Optional[List[str]] = None
+) -> List[Dict]:
+    """Vector or hybrid (BM25 + vector) search over SupportDocs
+
+    `categories` restricts the search to those categories' partitions (or
+    adds a category filter in shared storage mode).
+
+    Hybrid mode runs both searches in one aliased GraphQL request and fuses
+    the rankings; every hit then carries `_additional.fused_score`. If Weaviate
+    errors or misses RETRIEVAL_DEADLINE, hits come from the local BM25 index
+    and carry `_additional.source == "local"`. With a reranker configured,
+    RERANK_CANDIDATES hits are fetched and only the best `limit` are kept.
+    With `diversify`, candidate vectors are fetched too and the final `limit`
+    hits are picked by maximal marginal relevance (MMR_LAMBDA).
+    """
+    concepts = concepts or [query]
+    use_reranker = rerank and reranker is not None
+    fetch_limit = max(limit, settings.RERANK_CANDIDATES) if use_reranker or diversify else limit
+    
+    # Embed first (bounded by EMBEDDING_TIMEOUT, falling back to near_text),
+    # so a slow embedding isn't counted as a Weaviate deadline miss
+    search_args = await vector_search_args(concepts)
     try:
-        # Normalize search terms
-        search_terms = [query]
-        
-        # Add synonyms for common terms
-        term_synonyms = {
-            "block": ["blacklist", "block", "restrict", "ban"],
-            "blacklist": ["block", "blacklist", "restrict", "ban"],
-            "user": ["user", "account", "person"],
-            "add": ["add", "create", "new", "setup"]
+        with span("weaviate", mode=mode or settings.RETRIEVAL_MODE):
+            candidates = await asyncio.wait_for(
+                _search_weaviate(query, properties, concepts, search_args, where, fetch_limit, mode, alpha, fusion, diversify, categories),
+                timeout=settings.RETRIEVAL_DEADLINE
+            )
+    except (WeaviateError, httpx.HTTPError, asyncio.TimeoutError) as e:
+        global local_fallbacks, retrieval_deadline_misses
+        if isinstance(e, asyncio.TimeoutError):
+            retrieval_deadline_misses += 1
+        if not settings.LOCAL_INDEX_ENABLED or not len(local_index):
+            raise
+        local_fallbacks += 1
+        logger.warning(f"Weaviate search failed ({type(e).__name__}: {e}); serving from local BM25 index")
+        filters = filters_from_where(where) or {}
+        if categories:
+            filters["category"] = categories
+        with span("local_index"):
+            candidates = local_index.search(" ".join(concepts), limit=fetch_limit, filters=filters)
+    
+    if not use_reranker and not diversify:
+        return candidates
+    
+    query_vector = search_args.get("near_vector", {}).get("vector")
+    
+    if use_reranker:
+        # Keep the full reranked order when MMR still has to choose from it
+        top_k = len(candidates) if diversify else limit
+        with span("rerank", candidates=len(candidates)):
+            candidates = reranker.rerank(query, candidates, top_k=top_k, query_vector=query_vector)
+    if diversify:
+        with span("mmr"):
+            candidates = apply_mmr(candidates, k=limit, lambda_mult=settings.MMR_LAMBDA, query_vector=query_vector)
+    return candidates
+
+async def _search_weaviate(
+    query: str,
+    properties: List[str],
+    concepts: List[str],
+    search_args: Dict,
+    where: Optional[Dict],
+    limit: int,
+    mode: Optional[str],
+    alpha: Optional[float],
+    fusion: Optional[str],
+    with_vectors: bool = False,
+    categories: Optional[List[str]] = None
+) -> List[Dict]:
+    mode = mode or settings.RETRIEVAL_MODE
+    targets = partition_router.targets(categories, where)
+    if not targets:
+        return []
+    
+    vector_field = ["vector"] if with_vectors else []
+    vector_queries = [
+        {
+            "class_name": class_name,
+            "properties": properties,
+            "where": target_where,
+            "limit": limit,
+            "additional": ["id", "distance"] + vector_field,
+            **search_args
         }
+        for class_name, target_where in targets
+    ]
+    
+    # Both executors take a list of queries and return one result list per query
+    executor = graphql_batcher if settings.GRAPHQL_BATCH_ENABLED else weaviate_repo
+    if mode != "hybrid":
+        hits = _merge_partitions(await executor.get_many(vector_queries), "distance", limit)
+        return _autocut(await _deepen_vector_hits(executor, vector_queries, hits))
+    
+    # Fetch deeper lists so fusion has overlap to work with
+    depth = max(limit * 2, 10)
+    vector_queries = [{**vector_query, "limit": depth} for vector_query in vector_queries]
+    keyword_queries = [
+        {
+            "class_name": class_name,
+            "properties": properties,
+            "bm25": {"query": " ".join(concepts), "properties": ["content"]},
+            "where": target_where,
+            "limit": depth,
+            "additional": ["id", "score"] + vector_field
+        }
+        for class_name, target_where in targets
+    ]
+    results = await executor.get_many(vector_queries + keyword_queries)
+    vector_hits = _merge_partitions(results[:len(targets)], "distance", depth)
+    keyword_hits = _merge_partitions(results[len(targets):], "score", depth)
+    vector_hits = await _deepen_vector_hits(executor, vector_queries, vector_hits)
+    
+    # Fuse the uncut lists, then cut the fused list, so chunks the vector side
+    # drops can't come back in through the keyword side
+    fuse = FUSION_METHODS.get(fusion or settings.HYBRID_FUSION, FUSION_METHODS["rrf"])
+    fused = fuse(
+        vector_hits,
+        keyword_hits,
+        alpha=settings.HYBRID_ALPHA if alpha is None else alpha,
+        limit=limit
+    )
+    if not settings.AUTOCUT_ENABLED:
+        return fused
+    return autocut_fused(fused, vector_hits, _autocut(vector_hits))
+
+def _merge_partitions(result_lists: List[List[Dict]], key: str, limit: int) -> List[Dict]:
+    """Merge per-class hit lists into one ranking (nearest distance or highest BM25 score first)"""
+    if len(result_lists) == 1:
+        return result_lists[0]
+    hits = [hit for hits in result_lists for hit in hits]
+    if key == "distance":
+        hits.sort(key=lambda hit: hit["_additional"]["distance"])
+    else:
+        hits.sort(key=lambda hit: -float(hit["_additional"].get("score") or 0))
+    return hits[:limit]
+
+async def _deepen_vector_hits(executor, vector_queries: List[Dict], hits: List[Dict]) -> List[Dict]:
+    """Look deeper while a full page of vector hits is tightly clustered, so autocut can find the drop-off"""
+    if not settings.AUTOCUT_ENABLED:
+        return hits
+    depth = vector_queries[0]["limit"]
+    while len(hits) == depth and depth < settings.AUTOCUT_MAX_DEPTH and is_clustered(hits, settings.AUTOCUT_CLUSTER_SPREAD):
+        depth = min(depth * 2, settings.AUTOCUT_MAX_DEPTH)
+        results = await executor.get_many([{**vector_query, "limit": depth} for vector_query in vector_queries])
+        hits = _merge_partitions(results, "distance", depth)
+    return hits
+
+def _autocut(hits: List[Dict]) -> List[Dict]:
+    if not settings.AUTOCUT_ENABLED:
+        return hits
+    return autocut(hits, max_distance=settings.AUTOCUT_MAX_DISTANCE, min_gap=settings.AUTOCUT_MIN_GAP)
+
+def context_entry(doc: Dict) -> Dict:
+    """Context item for API responses, labelled with its real retrieval scores"""
+    additional = doc.get("_additional") or {}
+    return {
+        "content": doc["content"],
+        "confidence": confidence(additional.get("distance")),
+        "metadata": doc["metadata"],
+        "distance": additional.get("distance"),
+        "score": additional.get("fused_score"),
+        "rerank_score": additional.get("rerank_score")
+    }
+
+async def get_relevant_context(query: str, categories: Optional[List[str]] = None, expansion: Optional[Expansion] = None) -> Dict:
+    """Get relevant context from Weaviate, searching only `categories` if given"""
+    try:
+        # Expand known phrases with their synonyms (unless the caller already has)
+        if expansion is None:
+            with span("synonyms"):
+                expansion = synonym_engine.expand(query)
+        search_terms = expansion.terms
         
-        # Add relevant synonyms to search terms
-        for word in query.lower().split():
-            if word in term_synonyms:
-                search_terms.extend(term_synonyms[word])
+        logger.debug("Processing search with terms: %s (matched %s in %.0fus)", search_terms, expansion.matched, expansion.elapsed_us)
         
-        print(f"\nProcessing search with terms: {search_terms}")
+        cache_key = (corpus_version, normalize_query(query), tuple(sorted(categories or ())), tuple(sorted(t.lower() for t in expansion.synonyms)))
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Use expanded search terms in query
-        result = (
-            client.query
-            .get("SupportDocs", ["content", "metadata"])
-            .with_near_text({
-                "concepts": search_terms
-            })
-            .with_limit(5)
-            .do()
-        )
-        
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        with span("retrieval"):
+            docs = await retrieval_flight.do(("context",) + cache_key, lambda: search_documents(
+                query,
+                ["content", "metadata", "tokenCount"],
+                concepts=search_terms,
+                limit=settings.MMR_K or settings.MAX_CONTEXT_DOCS,
+                diversify=settings.MMR_ENABLED,
+                categories=categories
+            ))
+        
+        if not docs:
             return {
                 "contexts": [],
                 "context_text": ""
             }
             
-        contexts = []
-        context_text = ""
+        with span("pack"):
+            packed = context_packer.pack(docs)
+        contexts = [context_entry(doc) for doc in packed.docs]
         
-        for doc in result["data"]["Get"]["SupportDocs"]:
-            confidence = "80.4%" if len(contexts) == 0 else "75.2%" if len(contexts) == 1 else "72.6%"
-            
-            contexts.append({
-                "content": doc["content"],
-                "confidence": confidence,
-                "metadata": doc["metadata"]
-            })
-            
-            context_text += f"\n\nContext ({doc['metadata']}):\n{doc['content']}"
-            
-        return {
+        result = {
             "contexts": contexts,
-            "context_text": context_text
+            "context_text": packed.text,
+            "context_tokens": packed.tokens
         }
+        # Never pin degraded fallback results in the cache
+        if not any(doc["_additional"].get("source") == "local" for doc in docs):
+            retrieval_cache.set(cache_key, result)
+        return result
         
     except Exception as e:
-        print(f"Search error: {str(e)}")
+        logger.error(f"Search error: {str(e)}")
         return {
             "contexts": [],
             "context_text": ""
@@ -148,94 +822,165 @@ async def get_relevant_context(query: str, category: str) -> Dict:
 async def search_docs(
     query: str = Query(..., description="Search query"),
     category: str = Query(default="phone", description="Category to search in"),
-    limit: int = Query(default=5, description="Maximum number of results")
+    limit: int = Query(default=5, description="Maximum number of results"),
+    product: Optional[str] = Query(default=None, description="Only documents about this product"),
+    feature: Optional[str] = Query(default=None, description="Only documents about this feature"),
+    doc_type: Optional[str] = Query(default=None, description="Only documents of this metadata type")
 ) -> Dict:
     """Search endpoint with RAG"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        print(f"\nProcessing search: '{query}' in category: {category}")
-        
-        # Get relevant documents
-        result = (
-            client.query
-            .get("SupportDocs", ["content", "metadata"])
-            .with_where({
-                "path": ["category"],
-                "operator": "Equal",
-                "valueString": category
-            })
-            .with_near_text({
-                "concepts": [query]
-            })
-            .with_limit(limit)
-            .do()
-        )
-        
-        print(f"Search results: {result}")
-        
-        if result and "data" in result and "Get" in result["data"] and "SupportDocs" in result["data"]["Get"]:
-            contexts = []
-            context_text = ""
-            
-            for doc in result["data"]["Get"]["SupportDocs"]:
-                confidence = "80.4%" if len(contexts) == 0 else "75.2%" if len(contexts) == 1 else "72.6%"
-                
-                contexts.append({
-                    "content": doc["content"],
-                    "confidence": confidence,
-                    "metadata": doc["metadata"]
-                })
+        logger.debug("Processing search: %r in category: %s", query, category)
+        return await run_search(query, category, limit, where=metadata_filter(type=doc_type, product=product, feature=feature))
                 
-                context_text += f"\n\nContext ({doc['metadata']}):\n{doc['content']}"
-            
-            if contexts:
-                system_prompt = """You are a helpful support assistant. Use the provided context to answer the user's question.
-                If you cannot find a relevant answer in the context, say so.
-                Keep your answers clear and concise."""
-                
-                user_prompt = f"""Question: {query}
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-                Available context:{context_text}
+async def run_search(query: str, category: Optional[str], limit: int, generate: bool = True, where: Optional[Dict] = None) -> Dict:
+    """Retrieve context for a query and, if `generate`, answer it with the LLM
 
-                Please provide a clear, step-by-step answer based on this information."""
-                
-                try:
-                    response = openai_client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=500
-                    )
-                    
-                    ai_response = response.choices[0].message.content
-                    
-                except Exception as e:
-                    print(f"OpenAI API error: {str(e)}")
-                    ai_response = "I found relevant information but had trouble generating a response. Here's the raw information:\n\n" + context_text
-                
-                return {
-                    "query": query,
-                    "category": category,
-                    "response": ai_response,
-                    "results": contexts
-                }
-            
-            return {
-                "query": query,
-                "category": category,
-                "response": "I couldn't find any relevant information. Could you please rephrase your question?",
-                "results": []
-            }
-                
+    `where` pre-filters on the typed metadata properties (see metadata_filter).
+    """
+    # Get relevant documents from the category's partition
+    flight_key = ("search", normalize_query(query), category, limit, json.dumps(where, sort_keys=True) if where else None)
+    with span("retrieval"):
+        result = await retrieval_flight.do(flight_key, lambda: search_documents(
+            query,
+            ["content", "metadata", "tokenCount"],
+            where=where,
+            categories=[category] if category else None,
+            limit=limit
+        ))
+    
+    log_payload(logger, logging.DEBUG, "Search results", result)
+    
+    no_answer = {
+        "query": query,
+        "category": category,
+        "response": "I couldn't find any relevant information. Could you please rephrase your question?",
+        "results": []
+    }
+    if not result:
+        return no_answer
+    
+    with span("pack"):
+        packed = context_packer.pack(result)
+    context_text = packed.text
+    contexts = [context_entry(doc) for doc in packed.docs]
+    
+    if not contexts:
+        return no_answer
+    if not generate:
+        return {
+            "query": query,
+            "category": category,
+            "results": contexts
+        }
+    
+    system_prompt = """You are a helpful support assistant. Use the provided context to answer the user's question.
+    If you cannot find a relevant answer in the context, say so.
+    Keep your answers clear and concise."""
+    
+    user_prompt = f"""Question: {query}
+
+    Available context:{context_text}
+
+    Please provide a clear, step-by-step answer based on this information."""
+    
+    model, temperature, max_tokens = "gpt-3.5-turbo", 0.7, 500
+    cache_key = (
+        normalize_query(query),
+        category,
+        hashlib.sha256(context_text.encode("utf-8")).hexdigest(),
+        model,
+        temperature,
+        max_tokens
+    )
+    ai_response = answer_cache.get(cache_key)
+    if ai_response is not None:
+        return {
+            "query": query,
+            "category": category,
+            "response": ai_response,
+            "results": contexts,
+            "cached": True
+        }
+    
+    try:
+        with span("llm", model=model):
+            completion = await generation_flight.do(cache_key, lambda: llm_client.complete(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+        
+        ai_response = completion.content
+        answer_cache.set(cache_key, ai_response)
+        
     except Exception as e:
-        print(f"Search error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.warning(f"OpenAI API error: {str(e)}")
+        ai_response = "I found relevant information but had trouble generating a response. Here's the raw information:\n\n" + context_text
+    
+    return {
+        "query": query,
+        "category": category,
+        "response": ai_response,
+        "results": contexts,
+        "cached": False
+    }
+
+class BatchQuery(BaseModel):
+    query: str
+    category: Optional[str] = None
+    product: Optional[str] = None
+    feature: Optional[str] = None
+    doc_type: Optional[str] = None
+    limit: int = Field(5, ge=1, le=50)
+    id: Optional[str] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchQuery]
+    generate: bool = False
+    concurrency: Optional[int] = None
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """Run many searches with bounded concurrency, streaming one NDJSON line per query as it completes"""
+    if len(request.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_QUERIES} queries per batch")
+    concurrency = max(1, min(request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(index: int, item: BatchQuery) -> Dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await run_search(
+                    item.query,
+                    item.category,
+                    item.limit,
+                    generate=request.generate,
+                    where=metadata_filter(type=item.doc_type, product=item.product, feature=item.feature)
+                )
+            except Exception as e:
+                result = {"query": item.query, "category": item.category, "error": str(e)}
+            return {"index": index, "id": item.id, **result, "took_ms": round((time.perf_counter() - start) * 1000, 1)}
+    
+    async def lines():
+        tasks = [asyncio.ensure_future(run_one(i, item)) for i, item in enumerate(request.queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away: stop the remaining searches
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @app.get("/upload")
 async def upload_page(request: Request):
@@ -300,10 +1045,7 @@ async def upload_document(request: Request):
         # Clean the text
         processed_content = preprocess_text(content)
         chunks = chunk_document(processed_content)
-        
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
+        class_name = await ensure_partition(str(category))
         
         uploaded_ids = []
         for i, chunk in enumerate(chunks):
@@ -315,20 +1057,22 @@ async def upload_document(request: Request):
                 "chunkIndex": i,
                 "totalChunks": len(chunks)
             }
+            with_derived_fields(properties)
             
-            print(f"Adding chunk with properties:", properties)
+            log_payload(logger, logging.DEBUG, "Adding chunk", properties)
             
             # Add document and get ID
-            result = client.data_object.create(
-                data_object=properties,
-                class_name="SupportDocs"
-            )
+            result = await weaviate_repo.create_object(class_name, properties)
             
             uploaded_ids.append(result)
+            local_index.add(result, properties)
             
-            # Verify upload
-            uploaded_doc = client.data_object.get_by_id(result, class_name="SupportDocs")
-            print(f"Verified uploaded chunk {i}:", uploaded_doc)
+            # Read the chunk back only when someone is looking at the debug log
+            if logger.isEnabledFor(logging.DEBUG):
+                uploaded_doc = await weaviate_repo.get_object(class_name, result)
+                log_payload(logger, logging.DEBUG, f"Verified uploaded chunk {i}", uploaded_doc)
+        
+        invalidate_corpus_caches()
         
         return JSONResponse(
             content={
@@ -340,12 +1084,43 @@ async def upload_document(request: Request):
         )
             
     except Exception as e:
-        print(f"Upload error: {str(e)}")
+        logger.error(f"Upload error: {str(e)}")
         return JSONResponse(
             status_code=500,
             content={"status": "error", "message": str(e)}
         )
 
+@app.get("/stats")
+async def get_stats():
+    """Report connection pool utilisation and LLM latency"""
+    return {
+        "weaviate": {
+            "ready": await weaviate_repo.is_ready(),
+            "pool": weaviate_repo.pool_stats(),
+            "requests": weaviate_repo.request_stats()
+        },
+        "llm": llm_client.stats(),
+        "caches": {
+            "retrieval": retrieval_cache.stats(),
+            "answer": answer_cache.stats(),
+            "embeddings": embedder.stats()
+        },
+        "synonyms": synonym_engine.stats(),
+        "local_index": {**local_index.stats(), "fallbacks": local_fallbacks},
+        "reranker": reranker.stats() if reranker else None,
+        "tokenizer": token_counter.stats(),
+        "chat_history": history_manager.stats(),
+        "sessions": session_store.stats(),
+        "single_flight": {
+            "retrieval": retrieval_flight.stats(),
+            "generation": generation_flight.stats()
+        },
+        "graphql_batcher": graphql_batcher.stats(),
+        "category_router": category_router.stats(),
+        "logging": logging_stats(),
+        "trace_export": trace_exporter.stats() if trace_exporter else None
+    }
+
 @app.get("/categories")
 async def get_categories():
     """Get available categories"""
@@ -378,19 +1153,10 @@ async def get_categories():
 async def get_count():
     """Get total number of documents"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        result = (
-            client.query
-            .aggregate("SupportDocs")
-            .with_meta_count()
-            .do()
-        )
-        
-        count = result["data"]["Aggregate"]["SupportDocs"][0]["meta"]["count"]
-        return {"count": count}
+        counts = await asyncio.gather(*(
+            weaviate_repo.aggregate_count(class_name) for class_name in partition_router.classes()
+        ))
+        return {"count": sum(counts)}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -405,28 +1171,32 @@ async def get_documents(
     try:
         logger.info(f"Fetching documents - page: {page}, page_size: {page_size}, category: {category}")
         
-        # Build query
-        query = client.query.get("SupportDocs", [
-            "content", 
-            "metadata", 
-            "category"
-        ]).with_additional(["id"])
-        
-        # Add category filter if specified
-        if category and category != 'all':
-            query = query.with_where({
-                "path": ["category"],
-                "operator": "Equal",
-                "valueString": category
-            })
-        
-        # Add pagination
-        query = query.with_limit(page_size).with_offset((page - 1) * page_size)
-        
-        # Execute query
-        result = query.do()
+        # Category filter or partition, if specified
+        targets = partition_router.targets([category] if category and category != 'all' else None)
+        counts = await asyncio.gather(*(
+            weaviate_repo.aggregate_count(class_name, where=where) for class_name, where in targets
+        ))
+        
+        # Execute paginated query, walking across partitions in order
+        documents = []
+        offset = (page - 1) * page_size
+        for (class_name, where), count in zip(targets, counts):
+            if offset >= count:
+                offset -= count
+                continue
+            documents += await weaviate_repo.get(
+                class_name,
+                ["content", "metadata", "category"],
+                where=where,
+                limit=page_size - len(documents),
+                offset=offset,
+                additional=["id"]
+            )
+            offset = 0
+            if len(documents) >= page_size:
+                break
         
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        if not documents:
             return {
                 "documents": [],
                 "pagination": {
@@ -437,18 +1207,7 @@ async def get_documents(
                 }
             }
             
-        documents = result["data"]["Get"]["SupportDocs"]
-        
-        # Get total count for pagination
-        count_query = client.query.aggregate("SupportDocs").with_meta_count()
-        if category and category != 'all':
-            count_query = count_query.with_where({
-                "path": ["category"],
-                "operator": "Equal",
-                "valueString": category
-            })
-        count_result = count_query.do()
-        total_documents = count_result.get("data", {}).get("Aggregate", {}).get("SupportDocs", [{}])[0].get("meta", {}).get("count", 0)
+        total_documents = sum(counts)
         
         # Format response
         return {
@@ -469,30 +1228,23 @@ async def get_documents(
 async def delete_document(doc_id: str):
     """Delete all chunks of a document"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        # Get the document to find all related chunks
-        result = (
-            client.query
-            .get("SupportDocs", ["originalMetadata", "category"])
-            .with_additional(["id"])
-            .with_where({
-                "path": ["_additional", "id"],
-                "operator": "Equal",
-                "valueString": doc_id
-            })
-            .do()
-        )
-        
-        if result and "data" in result and "Get" in result["data"] and "SupportDocs" in result["data"]["Get"]:
-            doc = result["data"]["Get"]["SupportDocs"][0]
+        # Get the document (from whichever partition holds it) to find all related chunks
+        result = None
+        for class_name in partition_router.classes():
+            result = await weaviate_repo.get_object(class_name, doc_id)
+            if result:
+                break
+        
+        if result:
+            doc = result["properties"]
             
-            # Delete all chunks with same metadata and category
-            client.batch.delete_objects(
-                class_name="SupportDocs",
-                where={
+            if doc.get("sourceId"):
+                # Delete all chunks of the same source document (exact match on an indexed id)
+                where = {"path": ["sourceId"], "operator": "Equal", "valueString": doc["sourceId"]}
+                same_source = lambda fields: fields.get("sourceId") == doc["sourceId"]
+            else:
+                # Objects written before sourceId existed: same metadata and category
+                where = {
                     "operator": "And",
                     "operands": [
                         {
@@ -507,20 +1259,39 @@ async def delete_document(doc_id: str):
                         }
                     ]
                 }
-            )
+                same_source = lambda fields: (
+                    fields.get("originalMetadata") == doc["originalMetadata"]
+                    and fields.get("category") == doc["category"]
+                )
+            await weaviate_repo.delete_where(class_name, where)
+            
+            local_index.remove_where(same_source)
+            invalidate_corpus_caches()
             
             return {"status": "success", "message": "Document and all chunks deleted successfully"}
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def relevance_key(doc: Dict) -> float:
+    """Sort key where smaller means more relevant (rerank, then fused, then raw scores)"""
+    additional = doc.get("_additional", {})
+    if additional.get("rerank_score") is not None:
+        return -additional["rerank_score"]
+    if additional.get("fused_score") is not None:
+        return -additional["fused_score"]
+    distance = additional.get("distance")
+    if distance is not None:
+        return distance
+    return -float(additional.get("score") or 0)
+
 def generate_answer(query: str, docs: List[Dict]) -> Tuple[str, List[Dict]]:
     """Generate response and return used sources"""
     if not docs:
         return "I don't have enough information to answer that question.", []
     
-    # Sort documents by relevance (distance)
-    sorted_docs = sorted(docs, key=lambda x: x["_additional"]["distance"])
+    # Sort documents by relevance (fused score when hybrid, otherwise distance)
+    sorted_docs = sorted(docs, key=relevance_key)
     
     # Get the most relevant document
     primary_doc = sorted_docs[0]
@@ -529,7 +1300,7 @@ def generate_answer(query: str, docs: List[Dict]) -> Tuple[str, List[Dict]]:
     # Track used sources
     used_sources = [{
         "content": primary_doc["content"],
-        "distance": primary_doc["_additional"]["distance"],
+        "distance": primary_doc["_additional"].get("distance"),
         "metadata": primary_doc.get("metadata", "")
     }]
     
@@ -541,7 +1312,7 @@ def generate_answer(query: str, docs: List[Dict]) -> Tuple[str, List[Dict]]:
                 response += ". " + additional_info
                 used_sources.append({
                     "content": doc["content"],
-                    "distance": doc["_additional"]["distance"],
+                    "distance": doc["_additional"].get("distance"),
                     "metadata": doc.get("metadata", "")
                 })
     
@@ -573,6 +1344,12 @@ def calculate_confidence(
 class QueryRequest(BaseModel):
     query: str
     category: Optional[str] = None
+    product: Optional[str] = None  # pre-filters on typed metadata properties
+    feature: Optional[str] = None
+    doc_type: Optional[str] = None
+    mode: Optional[Literal["vector", "hybrid"]] = None
+    alpha: Optional[float] = Field(None, ge=0, le=1)  # weight of the vector side in hybrid mode
+    fusion: Optional[Literal["rrf", "weighted"]] = None
 
 @app.post("/query")
 async def query_documents(request: QueryRequest):
@@ -584,37 +1361,29 @@ async def query_documents(request: QueryRequest):
         if not request.query:
             raise HTTPException(status_code=400, detail="Query cannot be empty")
             
-        # Build vector search query
-        vector_query = (
-            client.query.get(
-                "SupportDocs",
-                ["content", "metadata", "category"]
-            )
-            .with_near_text({
-                "concepts": [request.query]
-            })
-            .with_additional(["distance"])
-        )
-        
-        # Add category filter if specified
+        # Restrict to the category's partition if specified
+        categories = None
         if request.category and request.category != 'all':
             logger.info(f"Filtering by category: {request.category}")
-            vector_query = vector_query.with_where({
-                "path": ["category"],
-                "operator": "Equal",
-                "valueString": request.category
-            })
-        
-        # Execute query
-        results = vector_query.do()
+            categories = [request.category]
+        
+        # Execute vector or hybrid search
+        docs = await search_documents(
+            request.query,
+            ["content", "metadata", "category"],
+            where=metadata_filter(type=request.doc_type, product=request.product, feature=request.feature),
+            categories=categories,
+            limit=5,
+            mode=request.mode,
+            alpha=request.alpha,
+            fusion=request.fusion
+        )
         
-        if not results.get("data", {}).get("Get", {}).get("SupportDocs"):
+        if not docs:
             return {"answer": "I don't have enough information to answer that question.",
                     "confidence": 0.0}
             
-        # Extract relevant documents
-        docs = results["data"]["Get"]["SupportDocs"]
-        distances = [d["_additional"]["distance"] for d in docs]
+        distances = [d["_additional"]["distance"] for d in docs if d["_additional"].get("distance") is not None]
         
         # Calculate vector similarity score (1 - normalized distance)
         vector_score = 1 - min(distances) if distances else 0
@@ -640,6 +1409,7 @@ async def query_documents(request: QueryRequest):
             "confidence": confidence,
             "confidence_label": confidence_label,
             "sources": [d["content"] for d in docs[:3]],  # Top 3 sources
+            "scores": [d["_additional"].get("fused_score", d["_additional"].get("distance")) for d in docs[:3]],
             "category": request.category  # Include category in response
         }
         
@@ -660,37 +1430,28 @@ def get_confidence_label(score: float) -> str:
 async def diagnose_documents():
     """Diagnostic endpoint to check document structure"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
         # Get all documents with explicit field selection
-        result = (
-            client.query
-            .get("SupportDocs", [
-                "content", 
-                "metadata", 
-                "category", 
-                "originalMetadata", 
-                "chunkIndex", 
-                "totalChunks"
-            ])
-            .with_additional(["id"])
-            .do()
-        )
+        docs_by_class = await fetch_all([
+            "content", 
+            "metadata", 
+            "category", 
+            "originalMetadata", 
+            "chunkIndex", 
+            "totalChunks"
+        ])
+        docs = [doc for class_docs in docs_by_class.values() for doc in class_docs]
         
-        print("Raw query result:", result)  # Debug print
+        log_payload(logger, logging.DEBUG, "Raw query result", docs)
         
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        if not docs:
             return {"status": "No documents found"}
-            
-        docs = result["data"]["Get"]["SupportDocs"]
         
         # Let's also try a direct object get for comparison
-        sample_doc_id = docs[0]["_additional"]["id"] if docs else None
+        sample_class = next(class_name for class_name, class_docs in docs_by_class.items() if class_docs)
+        sample_doc_id = docs_by_class[sample_class][0]["_additional"]["id"]
         if sample_doc_id:
-            direct_doc = client.data_object.get_by_id(sample_doc_id, class_name="SupportDocs")
-            print("Direct document fetch:", direct_doc)
+            direct_doc = await weaviate_repo.get_object(sample_class, sample_doc_id)
+            log_payload(logger, logging.DEBUG, "Direct document fetch", direct_doc)
         
         analysis = {
             "total_documents": len(docs),
@@ -739,36 +1500,29 @@ async def diagnose_documents():
         return analysis
             
     except Exception as e:
-        print(f"Error in diagnose_documents: {str(e)}")
+        logger.error(f"Error in diagnose_documents: {str(e)}")
         return {"error": str(e), "traceback": str(e.__traceback__)}
 
 @app.get("/backup")
 async def backup_database():
     """Backup all documents from the database"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        # Get all documents with all properties
-        result = (
-            client.query
-            .get("SupportDocs", [
-                "content", 
-                "metadata", 
-                "category", 
-                "originalMetadata", 
-                "chunkIndex", 
-                "totalChunks"
-            ])
-            .with_additional(["id"])
-            .do()
-        )
-        
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        # Get all documents with all properties, from every partition
+        docs_by_class = await fetch_all([
+            "content", 
+            "metadata", 
+            "category", 
+            "originalMetadata", 
+            "chunkIndex", 
+            "totalChunks",
+            "tokenCount",
+            *METADATA_FIELDS.values(),
+            "sourceId"
+        ])
+        docs = [doc for class_docs in docs_by_class.values() for doc in class_docs]
+        
+        if not docs:
             return {"status": "No documents found to backup"}
-            
-        docs = result["data"]["Get"]["SupportDocs"]
         
         # Create backup with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -784,7 +1538,7 @@ async def backup_database():
         }
             
     except Exception as e:
-        print(f"Error in backup_database: {str(e)}")
+        logger.error(f"Error in backup_database: {str(e)}")
         return {"error": str(e)}
 
 @app.post("/restore")
@@ -795,28 +1549,27 @@ async def restore_database(backup_file: str = Form(...)):
         with open(backup_file, 'r') as f:
             docs = json.load(f)
         
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
         # Upload each document
         restored_count = 0
         for doc in docs:
             try:
                 # Remove the _additional field if it exists
                 doc.pop('_additional', None)
+                if doc.get("tokenCount") is None or doc.get("sourceId") is None:
+                    with_derived_fields(doc)
                 
-                # Add document
-                client.data_object.create(
-                    data_object=doc,
-                    class_name="SupportDocs"
-                )
+                # Add document to its category's partition
+                class_name = await ensure_partition(doc.get("category"))
+                doc_id = await weaviate_repo.create_object(class_name, doc)
+                local_index.add(doc_id, doc)
                 restored_count += 1
                 
             except Exception as e:
-                print(f"Error restoring document: {str(e)}")
+                logger.error(f"Error restoring document: {str(e)}")
                 continue
         
+        invalidate_corpus_caches()
+        
         return {
             "status": "success",
             "message": f"Restored {restored_count} documents",
@@ -824,70 +1577,21 @@ async def restore_database(backup_file: str = Form(...)):
         }
             
     except Exception as e:
-        print(f"Error in restore_database: {str(e)}")
+        logger.error(f"Error in restore_database: {str(e)}")
         return {"error": str(e)}
 
 @app.get("/cleanup")
 async def cleanup_database():
     """Clean up and reinitialize the database"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
         # First backup existing data
         backup_result = await backup_database()
         if "error" in backup_result:
             return {"status": "error", "message": "Failed to backup existing data", "error": backup_result["error"]}
         
-        # Then proceed with cleanup
-        try:
-            client.schema.delete_class("SupportDocs")
-            print("Deleted existing SupportDocs class")
-        except Exception as e:
-            print(f"Error deleting class: {e}")
-        
-        # Create the class with proper schema
-        class_obj = {
-            "class": "SupportDocs",
-            "description": "Support documentation with proper chunking",
-            "vectorizer": "text2vec-openai",
-            "properties": [
-                {
-                    "name": "content",
-                    "dataType": ["text"],
-                    "description": "The document content"
-                },
-                {
-                    "name": "metadata",
-                    "dataType": ["text"],
-                    "description": "Document metadata"
-                },
-                {
-                    "name": "category",
-                    "dataType": ["text"],
-                    "description": "Document category"
-                },
-                {
-                    "name": "originalMetadata",
-                    "dataType": ["text"],
-                    "description": "Original document metadata"
-                },
-                {
-                    "name": "chunkIndex",
-                    "dataType": ["int"],
-                    "description": "Index of this chunk"
-                },
-                {
-                    "name": "totalChunks",
-                    "dataType": ["int"],
-                    "description": "Total number of chunks"
-                }
-            ]
-        }
-        
-        client.schema.create_class(class_obj)
-        print("Created new SupportDocs class")
+        # Then drop and recreate every SupportDocs class with the current schema
+        await recreate_collections()
+        invalidate_corpus_caches()
         
         return {
             "status": "success",
@@ -896,7 +1600,7 @@ async def cleanup_database():
         }
             
     except Exception as e:
-        print(f"Error in cleanup_database: {str(e)}")
+        logger.error(f"Error in cleanup_database: {str(e)}")
         return {"error": str(e)}
 
 def extract_and_format_document(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -917,87 +1621,32 @@ def validate_document(doc: Dict[str, Any]) -> bool:
 async def reprocess_documents(request: Request):
     """Extract, reformat, and re-upload all documents with proper chunking"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        print("Starting document reprocessing...")
+        logger.info("Starting document reprocessing...")
         
         # First, get all existing documents with only available fields
-        result = (
-            client.query
-            .get("SupportDocs", [
-                "content", 
-                "metadata", 
-                "category"
-            ])
-            .with_additional(["id"])
-            .do()
-        )
+        docs_by_class = await fetch_all([
+            "content", 
+            "metadata", 
+            "category"
+        ])
+        docs = [doc for class_docs in docs_by_class.values() for doc in class_docs]
         
-        print("Query result:", result)
+        log_payload(logger, logging.DEBUG, "Query result", docs)
         
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        if not docs:
             return JSONResponse(content={"status": "No documents found"})
             
-        docs = result["data"]["Get"]["SupportDocs"]
-        print(f"Found {len(docs)} documents to process")
+        logger.info(f"Found {len(docs)} documents to process")
         
         # Backup existing data
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_file = f"backup_{timestamp}.json"
         with open(backup_file, 'w') as f:
             json.dump(docs, f)
-        print(f"Backed up data to {backup_file}")
-        
-        # Clean up existing class
-        try:
-            client.schema.delete_class("SupportDocs")
-            print("Deleted existing SupportDocs class")
-        except Exception as e:
-            print(f"Error deleting class: {e}")
-            
-        # Recreate schema
-        class_obj = {
-            "class": "SupportDocs",
-            "description": "Support documentation with proper chunking",
-            "vectorizer": "text2vec-openai",
-            "properties": [
-                {
-                    "name": "content",
-                    "dataType": ["text"],
-                    "description": "The document content"
-                },
-                {
-                    "name": "metadata",
-                    "dataType": ["text"],
-                    "description": "Document metadata"
-                },
-                {
-                    "name": "category",
-                    "dataType": ["text"],
-                    "description": "Document category"
-                },
-                {
-                    "name": "originalMetadata",
-                    "dataType": ["text"],
-                    "description": "Original document metadata"
-                },
-                {
-                    "name": "chunkIndex",
-                    "dataType": ["int"],
-                    "description": "Index of this chunk"
-                },
-                {
-                    "name": "totalChunks",
-                    "dataType": ["int"],
-                    "description": "Total number of chunks"
-                }
-            ]
-        }
+        logger.info(f"Backed up data to {backup_file}")
         
-        client.schema.create_class(class_obj)
-        print("Created new SupportDocs class")
+        # Drop and recreate the class(es) with the current schema
+        await recreate_collections()
         
         # Process and re-upload documents
         processed_count = 0
@@ -1005,7 +1654,7 @@ async def reprocess_documents(request: Request):
         
         for doc in docs:
             try:
-                print(f"Processing document {processed_count + 1}/{len(docs)}")
+                logger.debug(f"Processing document {processed_count + 1}/{len(docs)}")
                 
                 # Format document with only available fields
                 formatted_doc = {
@@ -1017,7 +1666,7 @@ async def reprocess_documents(request: Request):
                 
                 # Validate
                 if not all(formatted_doc.get(field) for field in ["content", "metadata", "category"]):
-                    print(f"Skipping invalid document: {doc.get('_additional', {}).get('id')}")
+                    logger.warning(f"Skipping invalid document: {doc.get('_additional', {}).get('id')}")
                     error_count += 1
                     continue
                 
@@ -1025,9 +1674,10 @@ async def reprocess_documents(request: Request):
                 processed_content = preprocess_text(formatted_doc["content"])
                 chunks = chunk_document(processed_content)
                 
-                print(f"Created {len(chunks)} chunks")
+                logger.debug(f"Created {len(chunks)} chunks")
                 
-                # Upload chunks
+                # Upload chunks to the category's partition
+                class_name = await ensure_partition(formatted_doc["category"])
                 for i, chunk in enumerate(chunks):
                     properties = {
                         "content": str(chunk),
@@ -1037,20 +1687,21 @@ async def reprocess_documents(request: Request):
                         "chunkIndex": i,
                         "totalChunks": len(chunks)
                     }
+                    with_derived_fields(properties)
                     
-                    client.data_object.create(
-                        data_object=properties,
-                        class_name="SupportDocs"
-                    )
-                    print(f"Uploaded chunk {i+1}/{len(chunks)}")
+                    chunk_id = await weaviate_repo.create_object(class_name, properties)
+                    local_index.add(chunk_id, properties)
+                    logger.debug(f"Uploaded chunk {i+1}/{len(chunks)}")
                 
                 processed_count += 1
                 
             except Exception as e:
-                print(f"Error processing document: {str(e)}")
+                logger.error(f"Error processing document: {str(e)}")
                 error_count += 1
                 continue
         
+        invalidate_corpus_caches()
+        
         return JSONResponse(content={
             "status": "success",
             "processed": processed_count,
@@ -1059,7 +1710,7 @@ async def reprocess_documents(request: Request):
         })
             
     except Exception as e:
-        print(f"Error in reprocess_documents: {str(e)}")
+        logger.error(f"Error in reprocess_documents: {str(e)}")
         return JSONResponse(
             status_code=500,
             content={"error": str(e)}
@@ -1108,35 +1759,28 @@ async def validate_upload(request: Request):
 async def cleanup_existing_data():
     """Clean up existing documents without reprocessing"""
     try:
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-        )
-        
-        # Get all documents
-        result = (
-            client.query
-            .get("SupportDocs", [
-                "content", 
-                "metadata", 
-                "category", 
-                "originalMetadata",
-                "chunkIndex",
-                "totalChunks"
-            ])
-            .with_additional(["id"])
-            .do()
-        )
-        
-        if not result or "data" not in result or "Get" not in result["data"] or "SupportDocs" not in result["data"]["Get"]:
+        # Get all documents, remembering which partition each lives in
+        docs_by_class = await fetch_all([
+            "content", 
+            "metadata", 
+            "category", 
+            "originalMetadata",
+            "chunkIndex",
+            "totalChunks",
+            "tokenCount",
+            *METADATA_FIELDS.values(),
+            "sourceId"
+        ])
+        docs = [(class_name, doc) for class_name, class_docs in docs_by_class.items() for doc in class_docs]
+        
+        if not docs:
             return {"status": "No documents found"}
-            
-        docs = result["data"]["Get"]["SupportDocs"]
         
         # Process each document
         updated_count = 0
         error_count = 0
         
-        for doc in docs:
+        for class_name, doc in docs:
             try:
                 doc_id = doc["_additional"]["id"]
                 
@@ -1149,24 +1793,25 @@ async def cleanup_existing_data():
                     doc["chunkIndex"] = 0
                 if doc.get("totalChunks") is None:
                     doc["totalChunks"] = 1
+                if doc.get("tokenCount") is None or doc.get("sourceId") is None:
+                    with_derived_fields(doc)
                     
                 # Remove _additional field
                 doc.pop("_additional", None)
                 
                 # Update document
-                client.data_object.update(
-                    doc,
-                    class_name="SupportDocs",
-                    uuid=doc_id
-                )
+                await weaviate_repo.update_object(class_name, doc_id, doc)
+                local_index.add(doc_id, doc)
                 
                 updated_count += 1
                 
             except Exception as e:
-                print(f"Error updating document: {str(e)}")
+                logger.error(f"Error updating document: {str(e)}")
                 error_count += 1
                 continue
         
+        invalidate_corpus_caches()
+        
         return {
             "status": "success",
             "updated": updated_count,
@@ -1174,7 +1819,7 @@ async def cleanup_existing_data():
         }
             
     except Exception as e:
-        print(f"Error in cleanup_existing_data: {str(e)}")
+        logger.error(f"Error in cleanup_existing_data: {str(e)}")
         return {"error": str(e)}
 
 @app.get("/document-management")
@@ -1185,40 +1830,134 @@ async def document_management_page():
 class ChatRequest(BaseModel):
     message: str
     user_id: str
-    chat_history: List[dict] = []
+    session_id: Optional[str] = None
+    chat_history: List[dict] = []  # only needed by clients without sessions
     category: Optional[str] = None
 
-@app.post("/api/chat")
-async def chat(request: ChatRequest):
-    try:
-        # Get relevant context based on category
-        context = await get_relevant_context(request.message, request.category or "phone")
-        
-        # Log the context for debugging
-        logging.info(f"Context: {context}")
-        
-        # Prepare prompt with context
-        system_prompt = """You are a helpful IT support assistant. Use the provided context to answer questions.
-        If you cannot find relevant information in the context, say so."""
-        
+async def build_chat_messages(request: ChatRequest) -> Tuple[List[Dict], Session]:
+    """Retrieve context and assemble the chat prompt for the caller's session"""
+    category = request.category
+    if request.chat_history and not request.session_id:
+        # The client keeps the history: no server session, and the summary is
+        # cached per user and conversation (identified by its first message)
+        session = Session(session_id=None, user_id=request.user_id)
+        history_key = f"{request.user_id}:{fingerprint(request.chat_history[:1])}"
+        history_task = traced("history", history_manager.prepare(history_key, request.chat_history))
+    else:
+        session = await session_store.get_or_create(request.user_id, request.session_id)
+        if request.chat_history:
+            history = history_manager.prepare(session.session_id, request.chat_history)
+        else:
+            history = history_manager.prepare(session.session_id, session.messages, session.trimmed, session.trimmed_fingerprint)
+        history_task = traced("history", history)
+    
+    with span("synonyms"):
+        expansion = synonym_engine.expand(request.message)
+    query_vector = await chat_query_vector(expansion)
+    
+    # Follow-ups like "and on the T48?" reuse the previous turn's context, but
+    # only when the query is close to the one that context was retrieved for
+    if (
+        settings.SESSION_REUSE_CONTEXT
+        and session.last_context
+        and session.last_context.get("contexts")
+        and category in (None, session.last_category)
+        and is_follow_up(request.message, settings.FOLLOW_UP_MAX_WORDS)
+        and query_similarity(query_vector, session.last_query_vector) >= settings.FOLLOW_UP_SIMILARITY
+    ):
+        session_store.context_reuses += 1
+        context, history = session.last_context, await history_task
+    else:
+        # Retrieve context and bound the history concurrently
+        context, history = await asyncio.gather(
+            chat_context(request.message, category, expansion),
+            history_task
+        )
+        session.last_category = category
+        session.last_query_vector = query_vector
+    session.last_context = context
+    if not request.chat_history:
+        session.summarised = history.summarised
+    
+    # Log a sample of contexts for debugging
+    log_payload(logger, logging.DEBUG, "Context", context)
+    
+    # Prepare prompt with context
+    system_prompt = """You are a helpful IT support assistant. Use the provided context to answer questions.
+    If you cannot find relevant information in the context, say so."""
+    
+    with span("prompt"):
         messages = [
             {"role": "system", "content": system_prompt},
-            *request.chat_history,
+            *history.messages,
             {"role": "user", "content": f"Context: {context['context_text']}\n\nQuestion: {request.message}"}
         ]
-        
-        # Log the messages for debugging
-        logging.info(f"Messages: {messages}")
+    
+    # Log a sample of prompts for debugging
+    log_payload(logger, logging.DEBUG, "Messages", messages)
+    return messages, session
+
+async def chat_query_vector(expansion: Expansion) -> Optional[List[float]]:
+    """Embedding of an expanded chat query for follow-up detection, or None if unavailable
+
+    Same concepts as routing and retrieval, so the embedding cache serves them too.
+    """
+    if not settings.SESSION_REUSE_CONTEXT or not settings.QUERY_EMBEDDINGS:
+        return None
+    try:
+        with span("embed"):
+            return await embed_query(expansion.terms)
+    except Exception as e:
+        logger.warning(f"Query embedding failed, not reusing session context: {e}")
+        return None
+
+async def chat_context(message: str, category: Optional[str], expansion: Optional[Expansion] = None) -> Dict:
+    """Context for a chat turn from the chosen category, or the routed ones if none was chosen"""
+    if expansion is None:
+        with span("synonyms"):
+            expansion = synonym_engine.expand(message)
+    categories = [category] if category else await route_categories(expansion)
+    return await get_relevant_context(message, categories, expansion)
+
+async def record_turn(session: Session, message: str, answer: str) -> None:
+    if session.session_id is None:
+        return  # stateless client, nothing to keep
+    session.add_turn(message, answer, settings.SESSION_MAX_MESSAGES)
+    await session_store.save(session)
+
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Event frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat")
+async def chat(request: ChatRequest):
+    try:
+        messages, session = await build_chat_messages(request)
         
         # Get OpenAI response using environment variables directly
-        response = openai_client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-3.5-turbo"),
-            messages=messages,
-            temperature=float(os.getenv("TEMPERATURE", "0.7")),
-            max_tokens=int(os.getenv("MAX_TOKENS", "300"))
+        model = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
+        temperature = float(os.getenv("TEMPERATURE", "0.7"))
+        max_tokens = int(os.getenv("MAX_TOKENS", "300"))
+        
+        # Fresh conversations asking the same question share one completion
+        flight_key = (
+            "chat",
+            hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest(),
+            model,
+            temperature,
+            max_tokens
         )
+        with span("llm", model=model):
+            completion = await generation_flight.do(flight_key, lambda: llm_client.complete(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
         
-        return {"response": response.choices[0].message.content}
+        await record_turn(session, request.message, completion.content)
+        return {"response": completion.content, "session_id": session.session_id}
         
     except Exception as e:
         logging.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
@@ -1227,33 +1966,70 @@ async def chat(request: ChatRequest):
             detail={"error": str(e), "type": type(e).__name__}
         )
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the chat answer token by token as Server-Sent Events"""
+    messages, session = await build_chat_messages(request)
+    
+    async def event_stream():
+        tokens = []
+        model = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
+        try:
+            with span("llm", model=model, stream=True):
+                async for token in llm_client.stream(
+                    model=model,
+                    messages=messages,
+                    temperature=float(os.getenv("TEMPERATURE", "0.7")),
+                    max_tokens=int(os.getenv("MAX_TOKENS", "300"))
+                ):
+                    tokens.append(token)
+                    yield sse_event({"token": token})
+        except Exception as e:
+            logging.error(f"Error in chat stream: {str(e)}", exc_info=True)
+            yield sse_event({"error": str(e), "type": type(e).__name__}, event="error")
+            return
+        
+        answer = "".join(tokens)
+        await record_turn(session, request.message, answer)
+        yield sse_event({"response": answer, "session_id": session.session_id}, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/api/chat/session/{session_id}")
+async def end_chat_session(session_id: str):
+    """Forget a conversation, e.g. when the user starts over"""
+    await session_store.delete(session_id)
+    return {"status": "success", "session_id": session_id}
+
 @app.post("/api/load-documents")
 async def load_documents(documents: List[Document]):
     try:
-        doc_list = [{"content": doc.content, "metadata": doc.metadata} for doc in documents]
-        
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080"),
-            additional_headers={
-                "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
-            }
-        )
-        
-        # Add documents to Weaviate
-        with client.batch as batch:
-            batch.batch_size = 100
-            for doc in doc_list:
-                properties = {
-                    "content": doc["content"],
-                    "metadata": doc["metadata"],
-                    "category": json.loads(doc["metadata"]).get("type", "unknown")
-                }
-                batch.add_data_object(
-                    data_object=properties,
-                    class_name="SupportDocs"
-                )
+        # Parse each document's metadata once; its type picks the category
+        objects = []
+        for doc in documents:
+            fields = metadata_properties(doc.metadata)
+            objects.append(with_derived_fields({
+                "content": doc.content,
+                "metadata": doc.metadata,
+                "category": fields.get("docType", "unknown"),
+                **fields
+            }))
+        by_class: Dict[str, List[Dict]] = {}
+        for properties in objects:
+            class_name = await ensure_partition(properties["category"])
+            by_class.setdefault(class_name, []).append(properties)
+        for class_name, class_objects in by_class.items():
+            results = await weaviate_repo.batch_create(class_name, class_objects, batch_size=100)
+            for properties, item in zip(class_objects, results):
+                if item.get("id") and not (item.get("result") or {}).get("errors"):
+                    local_index.add(item["id"], properties)
+        invalidate_corpus_caches()
         
         return {"status": "success", "message": f"Added {len(documents)} documents"}
     except Exception as e:
-        print(f"Error loading documents: {str(e)}")
+        logger.error(f"Error loading documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
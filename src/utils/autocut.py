@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional
+
+
+def _distances(hits: List[Dict]) -> List[Optional[float]]:
+    return [(hit.get("_additional") or {}).get("distance") for hit in hits]
+
+
+def autocut(
+    hits: List[Dict],
+    max_distance: Optional[float] = None,
+    min_gap: Optional[float] = None,
+) -> List[Dict]:
+    """Cut vector hits (nearest first) at an absolute distance or the first large gap
+
+    Hits without distances (e.g. keyword or local results) are returned as-is.
+    """
+    distances = _distances(hits)
+    if not hits or any(d is None for d in distances):
+        return hits
+
+    for i, distance in enumerate(distances):
+        if max_distance is not None and distance > max_distance:
+            return hits[:i]
+        if min_gap is not None and i > 0 and distance - distances[i - 1] > min_gap:
+            return hits[:i]
+    return hits
+
+
+def autocut_fused(fused_hits: List[Dict], vector_hits: List[Dict], kept_vector_hits: List[Dict]) -> List[Dict]:
+    """Apply a vector-side autocut (vector_hits -> kept_vector_hits) to fused hybrid results
+
+    Hits the vector search returned survive only if the cut kept them.
+    Keyword-only hits lie beyond every vector hit on the page, so they are
+    dropped as soon as the cut removed anything from it.
+    """
+    if len(kept_vector_hits) == len(vector_hits):
+        return fused_hits
+    kept = {_hit_id(hit) for hit in kept_vector_hits}
+    return [hit for hit in fused_hits if _hit_id(hit) in kept]
+
+
+def _hit_id(hit: Dict) -> Optional[str]:
+    return (hit.get("_additional") or {}).get("id") or hit.get("content")
+
+
+def is_clustered(hits: List[Dict], spread: float) -> bool:
+    """True when every hit lies within `spread` of the nearest one
+
+    A full page like that says nothing about where relevance drops off, so
+    the caller should look deeper before cutting.
+    """
+    distances = _distances(hits)
+    if len(hits) < 2 or any(d is None for d in distances):
+        return False
+    return distances[-1] - distances[0] <= spread
+
+
+def confidence(distance: Optional[float]) -> Optional[str]:
+    """Cosine similarity as a percentage label, e.g. 0.196 -> "80.4%" """
+    if distance is None:
+        return None
+    return f"{max(0.0, 1 - distance) * 100:.1f}%"
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.weaviate_repository import AsyncWeaviateRepository, GraphQLError
+
+logger = logging.getLogger(__name__)
+
+
+class GraphQLBatcher:
+    """Micro-batches concurrent Get queries into one aliased GraphQL request
+
+    Queries arriving within `window_ms` of the first one in a batch are sent
+    together via `AsyncWeaviateRepository.get_many`; a batch is flushed early
+    once it reaches `max_batch` queries. Each caller gets back only its own
+    results or error: errors Weaviate ties to one alias fail only that query,
+    and a batch whose GraphQL Weaviate rejects as a whole is retried one
+    query at a time. Transport and HTTP errors fail every query in the batch.
+    """
+
+    def __init__(self, repo: AsyncWeaviateRepository, window_ms: float = 3.0, max_batch: int = 16, latency_window: int = 1000):
+        self.repo = repo
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.queries = 0
+        self.errors = 0
+        self.split = 0
+        self._started = time.monotonic()
+        self._waits = deque(maxlen=latency_window)
+        self._sizes = deque(maxlen=latency_window)
+
+    async def get(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run one build_get_field query (including class_name and properties)"""
+        return (await self.get_many([query]))[0]
+
+    async def get_many(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Queue several queries; they may share a request with other callers"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for query in queries:
+            future = loop.create_future()
+            self._pending.append((query, future, time.perf_counter()))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.gather(*futures)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, float]]) -> None:
+        sent = time.perf_counter()
+        self.batches += 1
+        self.queries += len(batch)
+        self._sizes.append(len(batch))
+        self._waits.extend((sent - queued) * 1000 for _, _, queued in batch)
+        try:
+            results = await self.repo.get_many([query for query, _, _ in batch], return_exceptions=True)
+        except GraphQLError as e:
+            # Rejected as a whole, e.g. one query names a class that was just
+            # dropped; retry singly so the others don't fail with it
+            self.errors += 1
+            if len(batch) == 1:
+                results = [e]
+            else:
+                self.split += 1
+                results = await asyncio.gather(
+                    *(self.repo.get(**query) for query, _, _ in batch),
+                    return_exceptions=True,
+                )
+        except Exception as e:
+            # Transport errors, timeouts and HTTP error statuses: retrying singly would only add load
+            self.errors += 1
+            results = [e] * len(batch)
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        waits = np.asarray(self._waits) if self._waits else None
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "queries": self.queries,
+            "errors": self.errors,
+            "split": self.split,
+            "mean_batch_size": round(float(np.mean(self._sizes)), 2) if self._sizes else 0.0,
+            "queries_per_second": round(self.queries / elapsed, 2) if elapsed else 0.0,
+            "added_latency_ms": {
+                "p50": round(float(np.percentile(waits, 50)), 3) if waits is not None else None,
+                "p95": round(float(np.percentile(waits, 95)), 3) if waits is not None else None,
+            },
+        }
@@ -0,0 +1,130 @@
+import math
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.utils.synonyms import tokenize
+
+
+def filters_from_where(where: Optional[Dict]) -> Optional[Dict[str, Any]]:
+    """Translate simple Weaviate `Equal` filters (optionally under `And`) into field filters"""
+    if not where:
+        return None
+    operands = where.get("operands") if where.get("operator") == "And" else [where]
+    filters = {}
+    for operand in operands:
+        if operand.get("operator") != "Equal":
+            raise ValueError(f"Unsupported filter for local index: {operand}")
+        value = next(v for k, v in operand.items() if k.startswith("value"))
+        filters[operand["path"][-1]] = value
+    return filters
+
+
+def _matches(field_value: Any, wanted: Any) -> bool:
+    """Equality, or membership when the filter value is a list"""
+    if isinstance(wanted, (list, tuple, set)):
+        return field_value in wanted
+    return field_value == wanted
+
+
+class BM25Index:
+    """In-memory inverted index over chunk content with Okapi BM25 scoring"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self.searches = 0
+        self.last_search_ms = 0.0
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict[str, Any]], **kwargs) -> "BM25Index":
+        """Build an index from plain property dicts, e.g. the seed documents"""
+        index = cls(**kwargs)
+        for i, doc in enumerate(documents):
+            doc_id = (doc.get("_additional") or {}).get("id") or str(i)
+            index.add(doc_id, doc)
+        return index
+
+    def add(self, doc_id: str, fields: Dict[str, Any]) -> None:
+        """Index (or re-index) one object"""
+        if doc_id in self._fields:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(fields.get("content") or ""))
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        self._fields[doc_id] = {k: v for k, v in fields.items() if k != "_additional"}
+
+    def remove(self, doc_id: str) -> None:
+        if doc_id not in self._fields:
+            return
+        for term in set(tokenize(self._fields[doc_id].get("content") or "")):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        del self._fields[doc_id]
+
+    def remove_where(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        doc_ids = [doc_id for doc_id, fields in self._fields.items() if predicate(fields)]
+        for doc_id in doc_ids:
+            self.remove(doc_id)
+        return len(doc_ids)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._lengths.clear()
+        self._fields.clear()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Score matching chunks; results are shaped like Weaviate Get hits"""
+        start = time.perf_counter()
+        n_docs = len(self._fields)
+        if not n_docs:
+            return []
+        avg_length = self._total_length / n_docs
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if filters:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if all(_matches(self._fields[doc_id].get(name), value) for name, value in filters.items())
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        self.searches += 1
+        self.last_search_ms = (time.perf_counter() - start) * 1000
+        return [
+            {**self._fields[doc_id], "_additional": {"id": doc_id, "score": round(score, 6), "source": "local"}}
+            for doc_id, score in ranked
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._fields),
+            "terms": len(self._postings),
+            "searches": self.searches,
+            "last_search_ms": round(self.last_search_ms, 3),
+        }
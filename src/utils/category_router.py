@@ -0,0 +1,90 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Route:
+    categories: List[str]
+    scores: Dict[str, float] = field(default_factory=dict)
+    elapsed_us: float = 0.0
+
+
+class CategoryRouter:
+    """Routes a query vector to the nearest category centroids
+
+    Centroids are the normalised mean of each category's chunk vectors, so
+    routing is one small matrix-vector product on an already embedded query.
+    The runner-up category is included when it scores within `margin` of the
+    best one, which covers questions that straddle two products.
+    """
+
+    def __init__(self, max_categories: int = 2, margin: float = 0.02, min_docs: int = 1):
+        self.max_categories = max_categories
+        self.margin = margin
+        self.min_docs = min_docs
+        self._labels: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._counts: Dict[str, int] = {}
+        self.built_at: Optional[float] = None
+        self.routed = 0
+        self.multi = 0
+        self._elapsed_us = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._centroids is not None
+
+    def fit(self, pairs: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """Build centroids from (category, vector) pairs"""
+        sums: Dict[str, np.ndarray] = {}
+        counts: Dict[str, int] = {}
+        for category, vector in pairs:
+            if not category or vector is None:
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            sums[category] = sums[category] + vector if category in sums else vector.copy()
+            counts[category] = counts.get(category, 0) + 1
+
+        labels = sorted(c for c in sums if counts[c] >= self.min_docs)
+        if not labels:
+            self._labels, self._centroids, self._counts = [], None, {}
+            return
+        centroids = np.stack([sums[c] / counts[c] for c in labels])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+        self._labels, self._centroids = labels, centroids
+        self._counts = {c: counts[c] for c in labels}
+        self.built_at = time.time()
+
+    def route(self, query_vector: Sequence[float]) -> Optional[Route]:
+        """Best one or two categories for the query, or None before fit()"""
+        if self._centroids is None:
+            return None
+        started = time.perf_counter()
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self._centroids @ (query / (np.linalg.norm(query) + 1e-12))
+        order = np.argsort(-scores)[:self.max_categories]
+        best = scores[order[0]]
+        chosen = [self._labels[i] for i in order if best - scores[i] <= self.margin]
+        elapsed_us = (time.perf_counter() - started) * 1e6
+
+        self.routed += 1
+        self.multi += len(chosen) > 1
+        self._elapsed_us += elapsed_us
+        return Route(
+            categories=chosen,
+            scores={label: round(float(score), 4) for label, score in zip(self._labels, scores)},
+            elapsed_us=elapsed_us,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "categories": dict(self._counts),
+            "built_at": self.built_at,
+            "routed": self.routed,
+            "multi_category": self.multi,
+            "mean_route_us": round(self._elapsed_us / self.routed, 1) if self.routed else 0.0,
+        }
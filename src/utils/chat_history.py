@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.utils.cache import TTLCache
+from src.utils.context_packer import TokenCounter
+from src.utils.llm_client import LLMClient
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message framing cost of the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """Summarise this support conversation for the assistant's own reference.
+Keep the user's setup, products, problems, steps already tried and answers already given.
+Be brief and factual."""
+
+
+def fingerprint(messages: List[Dict[str, Any]], start: str = "") -> str:
+    """Chained hash of a message prefix; fingerprint(b, fingerprint(a)) == fingerprint(a + b)"""
+    digest = start
+    for message in messages:
+        digest = hashlib.sha256((digest + json.dumps(message, sort_keys=True)).encode("utf-8")).hexdigest()
+    return digest
+
+
+@dataclass
+class HistorySummary:
+    covered: int  # messages folded in, counted from the start of the conversation
+    fingerprint: str
+    text: str
+
+
+@dataclass
+class PreparedHistory:
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    tokens_in: int = 0
+    tokens_out: int = 0
+    summarised: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+class ChatHistoryManager:
+    """Keeps the last turns verbatim and folds older ones into a rolling summary
+
+    Summaries are cached per user and only extended when another batch of
+    turns ages out, so most requests reuse the cached summary without an
+    extra LLM call. The returned history stays within `token_budget`.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        counter: TokenCounter,
+        model: str = "gpt-3.5-turbo",
+        keep_turns: int = 4,
+        token_budget: int = 1000,
+        summary_max_tokens: int = 200,
+        cache_size: int = 1000,
+        cache_ttl: float = 3600.0,
+    ):
+        self.llm_client = llm_client
+        self.counter = counter
+        self.model = model
+        self.keep_messages = keep_turns * 2
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.summaries = TTLCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self.summary_calls = 0
+        self.tokens_saved = 0
+
+    def message_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(self.counter.count(str(m.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+    async def prepare(
+        self,
+        user_id: str,
+        history: List[Dict[str, Any]],
+        offset: int = 0,
+        offset_fingerprint: str = "",
+    ) -> PreparedHistory:
+        """Bounded replacement for `history`, ready to splice into the chat messages
+
+        `offset` messages (with chained fingerprint `offset_fingerprint`) were
+        already dropped from the front of `history`, e.g. by a session cap;
+        they must have been covered by the summary. `summarised` in the result
+        counts from the start of the conversation.
+        """
+        result = PreparedHistory(tokens_in=self.message_tokens(history))
+
+        summary = self.summaries.get(user_id)
+        if (
+            summary is None
+            or not offset <= summary.covered <= offset + len(history)
+            or fingerprint(history[:summary.covered - offset], offset_fingerprint) != summary.fingerprint
+        ):
+            # New conversation, or the client rewrote its history
+            summary = HistorySummary(covered=offset, fingerprint=offset_fingerprint, text="")
+
+        # Fold when a full batch of turns has aged out or the verbatim tail is too big
+        start = summary.covered - offset
+        end = start
+        verbatim_budget = self.token_budget - self.summary_max_tokens
+        if len(history) - end > 2 * self.keep_messages or self.message_tokens(history[end:]) > verbatim_budget:
+            end = max(end, len(history) - self.keep_messages)
+            while end < len(history) and self.message_tokens(history[end:]) > verbatim_budget:
+                end += 1
+
+        if end > start:
+            try:
+                text = await self._summarise(summary.text, history[start:end])
+                summary = HistorySummary(
+                    covered=offset + end,
+                    fingerprint=fingerprint(history[start:end], summary.fingerprint),
+                    text=text,
+                )
+                self.summaries.set(user_id, summary)
+                start = end
+            except Exception as e:
+                # Without a fresh summary, drop the aged turns rather than blow the budget
+                logger.warning(f"History summarisation failed for {user_id}: {e}")
+                result.messages = [m for m in [self._summary_message(summary)] if m] + history[end:]
+                return self._finish(user_id, result, summarised=summary.covered)
+
+        result.messages = [m for m in [self._summary_message(summary)] if m] + history[start:]
+        return self._finish(user_id, result, summarised=summary.covered)
+
+    def _finish(self, user_id: str, result: PreparedHistory, summarised: int) -> PreparedHistory:
+        result.tokens_out = self.message_tokens(result.messages)
+        result.summarised = summarised
+        self.tokens_saved += max(result.tokens_saved, 0)
+        logger.info(
+            f"Chat history for {user_id}: {result.tokens_in} -> {result.tokens_out} tokens "
+            f"({result.tokens_saved} saved, {summarised} messages summarised)"
+        )
+        return result
+
+    @staticmethod
+    def _summary_message(summary: HistorySummary) -> Optional[Dict[str, str]]:
+        if not summary.text:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation: {summary.text}"}
+
+    async def _summarise(self, previous: str, messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+        if previous:
+            transcript = f"Earlier summary: {previous}\n\n{transcript}"
+        completion = await self.llm_client.complete(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript},
+            ],
+            temperature=0.0,
+            max_tokens=self.summary_max_tokens,
+        )
+        self.summary_calls += 1
+        return completion.content.strip()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "summaries": self.summaries.stats(),
+            "summary_calls": self.summary_calls,
+            "tokens_saved": self.tokens_saved,
+        }
@@ -47,24 +47,27 @@ except Exception as e:
 
 def check_docs():
     processor = DocumentProcessor()
-    context_manager = ContextManager(processor)
+    try:
+        context_manager = ContextManager(processor)
     
-    query = "what is callswitch one"
+        query = "what is callswitch one"
     
-    # Check raw documents
-    print("\nChecking direct document retrieval:")
-    docs = processor.query_documents(query, n_results=3)
-    print(json.dumps(docs, indent=2))
+        # Check raw documents
+        print("\nChecking direct document retrieval:")
+        docs = processor.query_documents(query, n_results=3)
+        print(json.dumps(docs, indent=2))
     
-    # Check context generation
-    print("\nChecking context generation:")
-    context = context_manager.get_context(query)
-    print(context)
+        # Check context generation
+        print("\nChecking context generation:")
+        context = context_manager.get_context(query)
+        print(context)
     
-    # Check full prompt
-    print("\nChecking enhanced prompt:")
-    enhanced = context_manager.enhance_prompt(query, "You are an assistant.")
-    print(enhanced)
+        # Check full prompt
+        print("\nChecking enhanced prompt:")
+        enhanced = context_manager.enhance_prompt(query, "You are an assistant.")
+        print(enhanced)
+    finally:
+        processor.close()
 
 if __name__ == "__main__":
     check_docs()
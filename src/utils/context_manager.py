@@ -1,33 +1,63 @@
 from .document_processor import DocumentProcessor
-from typing import List, Dict
+from .reranker import Reranker, FeatureReranker
+from .mmr import apply_mmr
+from .context_packer import ContextPacker, TokenCounter
+from .log_config import log_payload
+from typing import List, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ContextManager:
-    def __init__(self, doc_processor: DocumentProcessor):
+    def __init__(
+        self,
+        doc_processor: DocumentProcessor,
+        reranker: Optional[Reranker] = None,
+        n_candidates: int = 30,
+        n_context: int = 5,
+        mmr_lambda: Optional[float] = 0.7,
+        packer: Optional[ContextPacker] = None
+    ):
         self.doc_processor = doc_processor
+        self.reranker = reranker or FeatureReranker()
+        self.n_candidates = n_candidates
+        self.n_context = n_context
+        self.mmr_lambda = mmr_lambda
+        self.packer = packer or ContextPacker(TokenCounter())
 
     def get_context(self, query: str) -> str:
         """
         Get relevant context for a query
         """
-        print(f"Getting context for query: {query}")
-        # Increase number of results for better coverage
-        relevant_docs = self.doc_processor.query_documents(query, n_results=5)
+        logger.debug("Getting context for query: %r", query)
+        # Fetch a wider candidate set and keep only the best after reranking
+        use_mmr = self.mmr_lambda is not None
+        candidates = self.doc_processor.query_documents(query, n_results=self.n_candidates, with_vectors=use_mmr)
         
-        if not relevant_docs:
-            print("No relevant documents found")
+        if not candidates:
+            logger.debug("No relevant documents found")
             return ""
+        
+        if use_mmr:
+            # Rerank everything, then pick a diverse n_context from the ranking
+            ranked = self.reranker.rerank(query, candidates, top_k=len(candidates))
+            relevant_docs = apply_mmr(ranked, k=self.n_context, lambda_mult=self.mmr_lambda)
+        else:
+            relevant_docs = self.reranker.rerank(query, candidates, top_k=self.n_context)
             
-        # Improve context formatting
-        context = "Here is relevant information from our knowledge base:\n\n"
-        for i, doc in enumerate(relevant_docs, 1):
-            # Add metadata for better context
-            doc_type = doc['metadata'].get('type', 'general')
-            category = doc['metadata'].get('category', 'general')
-            context += f"{i}. [{doc_type}/{category}] {doc['content']}\n\n"
+        # Number each chunk and tag it with its metadata, within the token budget
+        packed = self.packer.pack(relevant_docs, render=self._render)
+        context = "Here is relevant information from our knowledge base:\n\n" + packed.text
         
-        print(f"Generated context: {context}")
+        log_payload(logger, logging.DEBUG, "Generated context", context)
         return context
 
+    @staticmethod
+    def _render(position: int, doc: Dict, content: str) -> str:
+        doc_type = doc['metadata'].get('type', 'general')
+        category = doc['metadata'].get('category', 'general')
+        return f"{position}. [{doc_type}/{category}] {content}\n\n"
+
     def enhance_prompt(self, query: str, system_prompt: str) -> str:
         """
         Enhance the system prompt with relevant context and instructions
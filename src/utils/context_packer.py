@@ -0,0 +1,133 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Renders one packed chunk: (1-based position, doc, possibly truncated content) -> prompt text
+Renderer = Callable[[int, Dict[str, Any], str], str]
+
+
+def default_renderer(position: int, doc: Dict[str, Any], content: str) -> str:
+    return f"\n\nContext ({doc.get('metadata', '')}):\n{content}"
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when installed, otherwise ~4 characters per token
+
+    The encoding is loaded once and counts are memoised per text.
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo", cache_size: int = 4096):
+        self.model = model
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            self.backend = "tiktoken"
+        except ImportError:
+            logger.warning("tiktoken not installed; estimating token counts from text length")
+            self._encoding = None
+            self.backend = "estimate"
+        except Exception as e:
+            # tiktoken fetches its encoding files on first use
+            logger.warning(f"Could not load tiktoken encoding ({e}); estimating token counts from text length")
+            self._encoding = None
+            self.backend = "estimate"
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return max(1, (len(text) + 3) // 4)
+
+    def stats(self) -> Dict[str, Any]:
+        info = self.count.cache_info()
+        return {"backend": self.backend, "model": self.model, "cached": info.currsize, "hits": info.hits, "misses": info.misses}
+
+
+def truncate_to_tokens(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """Longest prefix of whole sentences that fits in max_tokens ("" if none does)"""
+    kept: List[str] = []
+    used = 0
+    for sentence in SENTENCE_END.split(text.strip()):
+        cost = counter.count(sentence + " ")
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    return " ".join(kept)
+
+
+@dataclass
+class PackedContext:
+    text: str = ""
+    docs: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+
+class ContextPacker:
+    """Fills a prompt token budget with the highest scoring chunks
+
+    Chunks are taken in relevance order. A chunk that does not fit is cut at a
+    sentence boundary if enough budget remains, otherwise it is skipped in
+    favour of smaller ones further down. Stored `tokenCount` properties are
+    used instead of re-tokenising content.
+    """
+
+    def __init__(self, counter: TokenCounter, budget: int = 1500, min_chunk_tokens: int = 32):
+        self.counter = counter
+        self.budget = budget
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def content_tokens(self, doc: Dict[str, Any]) -> int:
+        stored = doc.get("tokenCount")
+        return stored if isinstance(stored, int) else self.counter.count(doc.get("content") or "")
+
+    def pack(
+        self,
+        docs: List[Dict[str, Any]],
+        render: Renderer = default_renderer,
+        key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        budget: Optional[int] = None,
+    ) -> PackedContext:
+        """Pack docs (sorted by `key` if given, smaller first) into the budget"""
+        budget = self.budget if budget is None else budget
+        ordered = sorted(docs, key=key) if key else list(docs)
+        packed = PackedContext()
+        parts = []
+
+        for doc in ordered:
+            content = doc.get("content") or ""
+            position = len(packed.docs) + 1
+            overhead = self.counter.count(render(position, doc, ""))
+            remaining = budget - packed.tokens - overhead
+
+            cost = self.content_tokens(doc)
+            if cost > remaining:
+                if remaining < self.min_chunk_tokens:
+                    packed.dropped += 1
+                    continue
+                content = truncate_to_tokens(content, remaining, self.counter)
+                if not content:
+                    packed.dropped += 1
+                    continue
+                cost = self.counter.count(content)
+                packed.truncated += 1
+
+            parts.append(render(position, doc, content))
+            packed.docs.append({**doc, "content": content})
+            packed.tokens += overhead + cost
+
+        packed.text = "".join(parts)
+        return packed
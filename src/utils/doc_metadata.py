@@ -0,0 +1,66 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional, Union
+
+# Metadata JSON keys promoted to their own properties. "category" is taken by
+# the support category (phone, fibre, ...), hence docCategory.
+METADATA_FIELDS = {
+    "type": "docType",
+    "category": "docCategory",
+    "product": "product",
+    "feature": "feature",
+}
+
+# Pure filter keys, kept out of the chunk embeddings. (SUPPORT_DOCS_PROPERTIES
+# still vectorizes metadata, category and originalMetadata as it always has;
+# changing that needs every chunk re-embedded.)
+_NOT_VECTORIZED = {"text2vec-openai": {"skip": True}}
+
+# Exact-match ("field" tokenized) properties, so Equal filters are cheap
+# inverted-index lookups instead of word matches on the metadata string
+METADATA_PROPERTIES = [
+    {"name": "docType", "dataType": ["text"], "tokenization": "field", "indexFilterable": True, "indexSearchable": False, "moduleConfig": _NOT_VECTORIZED, "description": "Document type from metadata"},
+    {"name": "docCategory", "dataType": ["text"], "tokenization": "field", "indexFilterable": True, "indexSearchable": False, "moduleConfig": _NOT_VECTORIZED, "description": "Document subcategory from metadata"},
+    {"name": "product", "dataType": ["text"], "tokenization": "field", "indexFilterable": True, "indexSearchable": False, "moduleConfig": _NOT_VECTORIZED, "description": "Product the document covers"},
+    {"name": "feature", "dataType": ["text"], "tokenization": "field", "indexFilterable": True, "indexSearchable": False, "moduleConfig": _NOT_VECTORIZED, "description": "Product feature the document covers"},
+    {"name": "sourceId", "dataType": ["text"], "tokenization": "field", "indexFilterable": True, "indexSearchable": False, "moduleConfig": _NOT_VECTORIZED, "description": "Identifies all chunks of one source document"},
+]
+
+
+def parse_metadata(metadata: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """Metadata as a dict; free-text metadata yields {}"""
+    if isinstance(metadata, dict):
+        return metadata
+    try:
+        parsed = json.loads(metadata or "")
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def metadata_properties(metadata: Union[str, Dict[str, Any], None]) -> Dict[str, str]:
+    """Typed properties for a document's metadata, parsed once at ingest"""
+    parsed = parse_metadata(metadata)
+    return {prop: str(parsed[key]) for key, prop in METADATA_FIELDS.items() if parsed.get(key) not in (None, "")}
+
+
+def metadata_from_properties(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata dict from a hit's typed properties (parsing only objects written before they existed)"""
+    fields = {key: doc[prop] for key, prop in METADATA_FIELDS.items() if doc.get(prop)}
+    return fields or parse_metadata(doc.get("metadata"))
+
+
+def source_id(category: Optional[str], original_metadata: Optional[str]) -> str:
+    """Stable id shared by every chunk of one uploaded document"""
+    return hashlib.sha1(f"{category or ''}\0{original_metadata or ''}".encode("utf-8")).hexdigest()
+
+
+def metadata_filter(**values: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Equal pre-filter on typed metadata properties, e.g. metadata_filter(product="callswitch")"""
+    operands = [
+        {"path": [METADATA_FIELDS.get(key, key)], "operator": "Equal", "valueString": value}
+        for key, value in values.items() if value
+    ]
+    if len(operands) <= 1:
+        return operands[0] if operands else None
+    return {"operator": "And", "operands": operands}
@@ -3,9 +3,15 @@ import os
 from enum import Enum
 from typing import Optional, Dict, Any, List
 from src.config import settings
-import json
+from src.utils.doc_metadata import METADATA_FIELDS, metadata_from_properties
+from src.utils.log_config import log_payload
+from src.utils.partitions import support_docs_class
+from src.utils.weaviate_client import WeaviateClientManager
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class Category(Enum):
     EMAIL = "email"
     PHONE = "phone"
@@ -13,47 +19,46 @@ class Category(Enum):
     FIBRE = "fibre"
 
 class DocumentProcessor:
-    def __init__(self, collection_name: str = "SupportDocs"):
-        print(f"Initializing Weaviate client with URL: {settings.WEAVIATE_URL}")
+    def __init__(self, collection_name: str = "SupportDocs", client: Optional[weaviate.Client] = None):
+        # Reuse a pooled client when one is passed in; otherwise own one until close()
+        self._manager: Optional[WeaviateClientManager] = None
+        if client is None:
+            logger.info(f"Initializing Weaviate client with URL: {settings.WEAVIATE_URL}")
+            self._manager = WeaviateClientManager(
+                url=os.getenv("WEAVIATE_URL", "http://weaviate:8080"),
+                headers={
+                    "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
+                }
+            )
+            client = self._manager.connect()
         
-        self.client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080"),
-            additional_headers={
-                "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
-            }
-        )
+        self.client = client
         self.collection_name = collection_name
         
         # Create schema if it doesn't exist
         self._create_schema()
 
     def _create_schema(self):
-        """Create the class schema in Weaviate"""
-        schema = {
-            "class": self.collection_name,
-            "vectorizer": "text2vec-openai",
-            "properties": [
-                {
-                    "name": "content",
-                    "dataType": ["text"],
-                },
-                {
-                    "name": "metadata",
-                    "dataType": ["text"],
-                },
-                {
-                    "name": "category",
-                    "dataType": ["text"],
-                    "description": "The category of the support document (email, phone, broadband, fibre)"
-                }
-            ]
-        }
+        """Create the class schema in Weaviate and note which properties it has"""
+        try:
+            self.client.schema.create_class(support_docs_class(self.collection_name))
+            logger.info(f"Created schema for {self.collection_name}")
+        except Exception as e:
+            logger.info(f"Schema might already exist: {e}")
         
+        # Classes created elsewhere (setup_db.py, older deployments) may lack the typed metadata properties
         try:
-            self.client.schema.create_class(schema)
-            print(f"Created schema for {self.collection_name}")
+            class_schema = self.client.schema.get(self.collection_name)
+            self.properties = {p["name"] for p in class_schema.get("properties") or []}
         except Exception as e:
-            print(f"Schema might already exist: {e}")
+            logger.warning(f"Could not read schema for {self.collection_name}: {e}")
+            self.properties = {"content", "metadata", "category"}
+
+    def close(self) -> None:
+        """Close the client if this processor created it"""
+        if self._manager is not None:
+            self._manager.close()
+            self._manager = None
 
     def add_documents(self, documents: List[Dict[str, str]]) -> None:
         """Add documents to Weaviate."""
@@ -66,21 +71,23 @@ class DocumentProcessor:
                         class_name=self.collection_name
                     )
         except Exception as e:
-            print(f"Error adding documents: {e}")
+            logger.error(f"Error adding documents: {e}")
 
-    def query_documents(self, query: str, n_results: int = 3) -> List[Dict]:
-        """Query Weaviate for relevant documents"""
-        print(f"Querying Weaviate with: {query}")
+    def query_documents(self, query: str, n_results: int = 3, with_vectors: bool = False) -> List[Dict]:
+        """Query Weaviate for relevant documents, optionally with their vectors"""
+        logger.debug("Querying Weaviate with: %r", query)
         try:
+            additional = ["distance", "vector"] if with_vectors else ["distance"]
             response = (
                 self.client.query
-                .get(self.collection_name, ["content", "metadata", "category"])
+                .get(self.collection_name, ["content", "metadata", "category", *(p for p in METADATA_FIELDS.values() if p in self.properties)])
                 .with_near_text({"concepts": [query]})
+                .with_additional(additional)
                 .with_limit(n_results)
                 .do()
             )
             
-            print(f"Weaviate response: {json.dumps(response, indent=2)}")
+            log_payload(logger, logging.DEBUG, "Weaviate response", response)
             
             documents = []
             if response and "data" in response and "Get" in response["data"]:
@@ -88,15 +95,16 @@ class DocumentProcessor:
                 for r in results:
                     documents.append({
                         'content': r['content'],
-                        'metadata': json.loads(r['metadata']),
-                        'category': r['category']
+                        'metadata': metadata_from_properties(r),
+                        'category': r['category'],
+                        '_additional': r.get('_additional') or {}
                     })
             
-            print(f"Found {len(documents)} relevant documents")
+            logger.debug("Found %d relevant documents", len(documents))
             return documents
             
         except Exception as e:
-            print(f"Error querying Weaviate: {str(e)}")
+            logger.error(f"Error querying Weaviate: {str(e)}")
             return []
 
     def process_document(self, content: str, metadata: str, category: Category) -> Optional[str]:
@@ -115,7 +123,7 @@ class DocumentProcessor:
             )
             return result
         except Exception as e:
-            print(f"Error processing document: {e}")
+            logger.error(f"Error processing document: {e}")
             return None
 
     def batch_process_documents(self, documents: List[Dict[str, Any]]) -> None:
@@ -129,7 +137,7 @@ class DocumentProcessor:
                         class_name=self.collection_name
                     )
         except Exception as e:
-            print(f"Error in batch processing: {e}")
+            logger.error(f"Error in batch processing: {e}")
 
     def get_document_count(self, category: Optional[Category] = None) -> int:
         """
@@ -0,0 +1,116 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from src.utils.cache import TTLCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder:
+    """Turns texts into vectors; subclass to plug in another model"""
+
+    model: str = ""
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeds with the same OpenAI model Weaviate's text2vec-openai module uses"""
+
+    def __init__(self, client: AsyncOpenAI, model: str = "text-embedding-ada-002"):
+        self.client = client
+        self.model = model
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class CachedEmbedder(Embedder):
+    """LRU cache of query vectors in front of another embedder"""
+
+    def __init__(self, embedder: Embedder, max_entries: int = 10000, cache_path: Optional[str] = None):
+        self.embedder = embedder
+        self.model = embedder.model
+        self.cache_path = cache_path
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=float("inf"))
+        self.embedded = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        keys = [normalize_query(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        missing = []
+        for key in keys:
+            if key in vectors or key in missing:
+                continue
+            vector = self.cache.get(key)
+            if vector is None:
+                missing.append(key)
+            else:
+                vectors[key] = vector
+
+        # One round trip for every text we have not seen before
+        if missing:
+            for key, vector in zip(missing, await self.embedder.embed(missing)):
+                self.cache.set(key, vector)
+                vectors[key] = vector
+            self.embedded += len(missing)
+
+        return [vectors[key] for key in keys]
+
+    async def embed_query(self, concepts: List[str]) -> List[float]:
+        """Embed one or more concepts into a single search vector
+
+        Multiple concepts are averaged, the same way Weaviate's nearText
+        combines them.
+        """
+        matrix = np.asarray(await self.embed(concepts), dtype=np.float32)
+        vector = matrix.mean(axis=0)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def load(self) -> None:
+        """Warm the cache from disk, if persistence is configured"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            data = np.load(self.cache_path, allow_pickle=False)
+            if str(data["model"]) != self.model:
+                logger.info(f"Ignoring embedding cache built with {data['model']}")
+                return
+            for key, vector in zip(data["keys"], data["vectors"]):
+                self.cache.set(str(key), vector.tolist())
+            logger.info(f"Loaded {len(self.cache)} cached query embeddings from {self.cache_path}")
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache {self.cache_path}: {e}")
+
+    def save(self) -> None:
+        """Persist the cache to disk, if persistence is configured"""
+        if not self.cache_path or not len(self.cache):
+            return
+        try:
+            entries = list(self.cache.items())
+            tmp_path = self.cache_path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                model=np.array(self.model),
+                keys=np.array([key for key, _ in entries]),
+                vectors=np.asarray([vector for _, vector in entries], dtype=np.float32),
+            )
+            os.replace(tmp_path, self.cache_path)
+            logger.info(f"Saved {len(entries)} query embeddings to {self.cache_path}")
+        except Exception as e:
+            logger.warning(f"Could not save embedding cache {self.cache_path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats.pop("ttl_seconds", None)
+        stats.update({"model": self.model, "embedded": self.embedded})
+        return stats
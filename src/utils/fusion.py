@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+
+
+def _doc_id(doc: Dict) -> str:
+    additional = doc.get("_additional") or {}
+    return additional.get("id") or doc.get("content", "")
+
+
+def _merge(fused: Dict[str, Dict], doc: Dict) -> Dict:
+    """Keep one copy per object, combining the _additional fields of both lists"""
+    key = _doc_id(doc)
+    if key not in fused:
+        fused[key] = {**doc, "_additional": dict(doc.get("_additional") or {})}
+    else:
+        for name, value in (doc.get("_additional") or {}).items():
+            fused[key]["_additional"].setdefault(name, value)
+    return fused[key]
+
+
+def reciprocal_rank_fusion(
+    vector_hits: List[Dict],
+    keyword_hits: List[Dict],
+    alpha: float = 0.5,
+    k: int = 60,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """Fuse two ranked lists by weighted reciprocal rank
+
+    score = alpha / (k + vector_rank) + (1 - alpha) / (k + keyword_rank)
+    """
+    fused: Dict[str, Dict] = {}
+    scores: Dict[str, float] = {}
+    for weight, hits, rank_name in ((alpha, vector_hits, "vector_rank"), (1 - alpha, keyword_hits, "keyword_rank")):
+        for rank, doc in enumerate(hits, 1):
+            merged = _merge(fused, doc)
+            merged["_additional"][rank_name] = rank
+            key = _doc_id(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+
+    return _ranked(fused, scores, limit)
+
+
+def relative_score_fusion(
+    vector_hits: List[Dict],
+    keyword_hits: List[Dict],
+    alpha: float = 0.5,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """Fuse min-max normalised vector similarity and BM25 scores
+
+    score = alpha * vector_similarity + (1 - alpha) * keyword_score
+    """
+    fused: Dict[str, Dict] = {}
+    scores: Dict[str, float] = {}
+
+    similarities = [1 - float(doc["_additional"]["distance"]) for doc in vector_hits]
+    keyword_scores = [float(doc["_additional"].get("score") or 0) for doc in keyword_hits]
+
+    for weight, hits, raw in ((alpha, vector_hits, similarities), (1 - alpha, keyword_hits, keyword_scores)):
+        if not hits:
+            continue
+        low, high = min(raw), max(raw)
+        for doc, value in zip(hits, raw):
+            _merge(fused, doc)
+            normalised = (value - low) / (high - low) if high > low else 1.0
+            key = _doc_id(doc)
+            scores[key] = scores.get(key, 0.0) + weight * normalised
+
+    return _ranked(fused, scores, limit)
+
+
+def _ranked(fused: Dict[str, Dict], scores: Dict[str, float], limit: Optional[int]) -> List[Dict]:
+    ranked = sorted(fused, key=lambda key: scores[key], reverse=True)
+    if limit is not None:
+        ranked = ranked[:limit]
+    results = []
+    for key in ranked:
+        doc = fused[key]
+        doc["_additional"]["fused_score"] = round(scores[key], 6)
+        results.append(doc)
+    return results
+
+
+FUSION_METHODS = {
+    "rrf": reciprocal_rank_fusion,
+    "weighted": relative_score_fusion,
+}
@@ -0,0 +1,153 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional, Any, List
+
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Completion:
+    content: str
+    model: str
+    latency_ms: float
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+class LLMClient:
+    """Async OpenAI chat client on a shared, keep-alive connection pool"""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        latency_window: int = 1000,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(limits=self.limits, timeout=timeout),
+        )
+        self.calls = 0
+        self.errors = 0
+        self.tokens = {"prompt": 0, "completion": 0}
+        self._latencies = deque(maxlen=latency_window)
+        self._first_token_latencies = deque(maxlen=latency_window)
+
+    def _record(self, latency_ms: float) -> None:
+        self.calls += 1
+        self._latencies.append(latency_ms)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> Completion:
+        """Run a chat completion and time it"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        except Exception:
+            self.errors += 1
+            raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._record(latency_ms)
+        usage = response.usage.model_dump() if response.usage else {}
+        self.tokens["prompt"] += usage.get("prompt_tokens") or 0
+        self.tokens["completion"] += usage.get("completion_tokens") or 0
+        logger.info(f"LLM call to {model} took {latency_ms:.0f}ms (tokens: {usage.get('total_tokens', '?')})")
+        return Completion(
+            content=response.choices[0].message.content,
+            model=model,
+            latency_ms=latency_ms,
+            usage=usage,
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        """Yield completion tokens as the model produces them"""
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    # Streamed chunks carry no usage; one content delta is about one token
+                    self.tokens["completion"] += 1
+                    yield token
+        except Exception:
+            self.errors += 1
+            raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._record(latency_ms)
+        if first_token_ms is not None:
+            self._first_token_latencies.append(first_token_ms)
+        logger.info(f"LLM stream from {model} took {latency_ms:.0f}ms (first token after {first_token_ms or 0:.0f}ms)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency summary over the most recent calls"""
+        latencies = sorted(self._latencies)
+        first_token = sorted(self._first_token_latencies)
+
+        def percentile(p: float, values: List[float] = latencies) -> Optional[float]:
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(p * len(values)))], 1)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "tokens": dict(self.tokens),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "latency_ms": {
+                "last": round(self._latencies[-1], 1) if self._latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+            "first_token_ms": {
+                "p50": percentile(0.5, first_token),
+                "p95": percentile(0.95, first_token),
+            },
+        }
+
+    async def close(self) -> None:
+        await self.client.close()
+        logger.info("Closed OpenAI connection pool")
@@ -1,8 +1,9 @@
 import weaviate
 import os
-import json
 import sys
 
+from src.utils.doc_metadata import metadata_properties, source_id
+
 # Example documents with pre-serialized metadata
 documents = [
     # VoIP Documents
@@ -1439,10 +1440,13 @@ def load_test_documents():
         with client.batch as batch:
             batch.batch_size = 100
             for doc in documents:
+                fields = metadata_properties(doc["metadata"])
                 properties = {
                     "content": doc["content"],
                     "metadata": doc["metadata"],
-                    "category": json.loads(doc["metadata"]).get("type", "unknown")
+                    "category": fields.get("docType", "unknown"),
+                    "sourceId": source_id(fields.get("docType", "unknown"), doc["metadata"]),
+                    **fields
                 }
                 batch.add_data_object(
                     data_object=properties,
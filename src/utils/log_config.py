@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional, Sequence
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller
+
+    Records are formatted on the listener thread, not the request path, and are
+    dropped (and counted) when the queue is full instead of stalling the loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class Payload:
+    """Lazily rendered, truncated payload for log messages"""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int = 2000):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else json.dumps(self.value, default=str)
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}... ({len(text)} chars)"
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_payload_sample_rate = 1.0
+_payload_max_chars = 2000
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """"httpx=WARNING,src.utils.batcher=DEBUG" -> {"httpx": "WARNING", ...}"""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(
+    level: str = "INFO",
+    module_levels: str = "",
+    fmt: str = "text",
+    queue_size: int = 10000,
+    payload_sample_rate: float = 1.0,
+    payload_max_chars: int = 2000,
+    filters: Sequence[logging.Filter] = (),
+) -> None:
+    """Route all logging through a bounded queue drained by a background thread
+
+    `filters` run on the caller's thread, e.g. to capture context variables.
+    """
+    global _handler, _listener, _payload_sample_rate, _payload_max_chars
+    stop_logging()
+    _payload_sample_rate = payload_sample_rate
+    _payload_max_chars = payload_max_chars
+
+    stream = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _handler = DroppingQueueHandler(log_queue)
+    for record_filter in filters:
+        _handler.addFilter(record_filter)
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    for name, module_level in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread; later records are written directly"""
+    global _handler, _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _handler, _listener = None, None
+
+
+atexit.register(stop_logging)
+
+
+def log_payload(logger: logging.Logger, level: int, label: str, payload: Any, sample_rate: Optional[float] = None) -> None:
+    """Log a (possibly large) payload for a sample of calls, truncated
+
+    Nothing is serialised unless the level is enabled and the call is sampled,
+    and then only on the logging thread.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _payload_sample_rate if sample_rate is None else sample_rate
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, "%s: %s", label, Payload(payload, _payload_max_chars))
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "payload_sample_rate": _payload_sample_rate,
+        "payload_max_chars": _payload_max_chars,
+    }
@@ -0,0 +1,117 @@
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from src.utils.tracing import Trace
+
+# Seconds; covers cached lookups through slow LLM generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+StatsSource = Callable[[], Dict[str, Any]]
+
+
+class RequestMetrics:
+    """Per-route request counters, latency histograms and in-flight gauges"""
+
+    def __init__(self, registry: CollectorRegistry):
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by route and status",
+            ["method", "route", "status"], registry=registry,
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds", "HTTP request latency (to first byte for streams)",
+            ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+        )
+        self.in_flight = Gauge(
+            "http_requests_in_flight", "Requests currently being handled",
+            ["route"], registry=registry,
+        )
+        self.stages = Histogram(
+            "rag_stage_duration_seconds", "Time spent per traced stage (retrieval, weaviate, llm, ...)",
+            ["stage"], buckets=LATENCY_BUCKETS, registry=registry,
+        )
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.requests.labels(method, route, str(status)).inc()
+        self.latency.labels(method, route).observe(seconds)
+
+    def observe_trace(self, trace: Trace) -> None:
+        for stage, ms in trace.stage_durations().items():
+            self.stages.labels(stage).observe(ms / 1000)
+
+
+class StatsCollector:
+    """Exposes the counters components already keep in stats() at scrape time
+
+    Nothing is recorded on the request path; each scrape reads the current
+    totals from the LLM client, Weaviate repository, caches, single-flight
+    groups and GraphQL batcher.
+    """
+
+    def __init__(
+        self,
+        llm: StatsSource,
+        weaviate: StatsSource,
+        pool: StatsSource,
+        caches: Dict[str, StatsSource],
+        flights: Dict[str, StatsSource],
+        batcher: Optional[StatsSource] = None,
+        counters: Optional[StatsSource] = None,
+    ):
+        self.llm = llm
+        self.weaviate = weaviate
+        self.pool = pool
+        self.caches = caches
+        self.flights = flights
+        self.batcher = batcher
+        self.counters = counters
+
+    def collect(self) -> Iterator[Any]:
+        llm = self.llm()
+        calls = CounterMetricFamily("llm_calls", "LLM completions", labels=["outcome"])
+        calls.add_metric(["ok"], llm["calls"])
+        calls.add_metric(["error"], llm["errors"])
+        yield calls
+        tokens = CounterMetricFamily("llm_tokens", "LLM tokens used", labels=["kind"])
+        for kind, count in llm.get("tokens", {}).items():
+            tokens.add_metric([kind], count)
+        yield tokens
+
+        weaviate = self.weaviate()
+        yield CounterMetricFamily("weaviate_requests", "Requests sent to Weaviate", value=weaviate["requests"])
+        yield CounterMetricFamily("weaviate_errors", "Weaviate requests that failed", value=weaviate["errors"])
+        yield CounterMetricFamily("weaviate_timeouts", "Weaviate requests that timed out", value=weaviate["timeouts"])
+        pool = self.pool()
+        for key in ("open", "in_use", "idle"):
+            if key in pool:
+                yield GaugeMetricFamily(f"weaviate_pool_connections_{key}", f"Weaviate pool connections ({key})", value=pool[key])
+
+        hits = CounterMetricFamily("rag_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("rag_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("rag_cache_hit_ratio", "Cache hit ratio since start", labels=["cache"])
+        entries = GaugeMetricFamily("rag_cache_entries", "Entries currently cached", labels=["cache"])
+        for name, source in self.caches.items():
+            stats = source()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hit_ratio"])
+            entries.add_metric([name], stats["entries"])
+        yield from (hits, misses, ratio, entries)
+
+        collapsed = CounterMetricFamily("rag_singleflight_collapsed", "Calls served by an in-flight duplicate", labels=["group"])
+        in_flight = GaugeMetricFamily("rag_singleflight_in_flight", "Distinct calls in flight", labels=["group"])
+        for name, source in self.flights.items():
+            stats = source()
+            collapsed.add_metric([name], stats["collapsed"])
+            in_flight.add_metric([name], stats["in_flight"])
+        yield from (collapsed, in_flight)
+
+        if self.batcher is not None:
+            stats = self.batcher()
+            yield CounterMetricFamily("graphql_batches", "GraphQL batches sent", value=stats["batches"])
+            yield CounterMetricFamily("graphql_batched_queries", "Queries sent in GraphQL batches", value=stats["queries"])
+
+        if self.counters is not None:
+            for name, value in self.counters().items():
+                yield CounterMetricFamily(name, name.replace("_", " ").capitalize(), value=value)
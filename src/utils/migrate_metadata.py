@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import os
+
+from src.utils.doc_metadata import METADATA_FIELDS, METADATA_PROPERTIES, metadata_properties, source_id
+from src.utils.partitions import PartitionRouter
+from src.utils.weaviate_repository import AsyncWeaviateRepository
+
+CATEGORIES = ["phone", "fibre", "broadband", "email"]
+
+
+async def migrate(url: str, base_class: str, storage_mode: str, concurrency: int, dry_run: bool) -> None:
+    """Backfill typed metadata properties (docType, docCategory, product, feature) and sourceId
+
+    Existing objects are patched in place with their current vector sent
+    along, so Weaviate does not re-vectorize them (no embedding calls).
+    """
+    repo = AsyncWeaviateRepository(url, headers={"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY", "")})
+    await repo.connect()
+    try:
+        partitions = PartitionRouter(base_class, mode=storage_mode, categories=CATEGORIES)
+        schema = await repo.get_schema()
+        partitions.discover(schema)
+        existing = {c["class"]: {p["name"] for p in c.get("properties") or []} for c in schema.get("classes") or []}
+
+        for class_name in partitions.classes():
+            if class_name not in existing:
+                continue
+            for property_obj in METADATA_PROPERTIES:
+                if property_obj["name"] not in existing[class_name]:
+                    print(f"Adding {property_obj['name']} to {class_name}")
+                    if not dry_run:
+                        await repo.add_property(class_name, dict(property_obj))
+
+            selected = [
+                name for name in ["metadata", "category", "originalMetadata", *METADATA_FIELDS.values(), "sourceId"]
+                if name in existing[class_name]
+            ]
+            scanned, changed, pending = 0, 0, []
+            async for doc in repo.iterate(class_name, selected, additional=["vector"]):
+                scanned += 1
+                updates = metadata_properties(doc.get("metadata"))
+                updates["sourceId"] = source_id(doc.get("category"), doc.get("originalMetadata") or doc.get("metadata"))
+                updates = {k: v for k, v in updates.items() if doc.get(k) != v}
+                if not updates:
+                    continue
+                changed += 1
+                if dry_run:
+                    continue
+                pending.append(repo.update_object(class_name, doc["_additional"]["id"], updates, vector=doc["_additional"].get("vector")))
+                if len(pending) >= concurrency:
+                    await asyncio.gather(*pending)
+                    pending = []
+            await asyncio.gather(*pending)
+            print(f"{class_name}: {changed}/{scanned} objects {'would be ' if dry_run else ''}updated")
+    finally:
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Promote metadata JSON keys to typed, filterable SupportDocs properties")
+    parser.add_argument("--url", default=os.getenv("WEAVIATE_URL", "http://localhost:8080"))
+    parser.add_argument("--base-class", default="SupportDocs")
+    parser.add_argument("--storage-mode", choices=["shared", "class"], default=os.getenv("STORAGE_MODE", "shared"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.url, args.base_class, args.storage_mode, args.concurrency, args.dry_run))
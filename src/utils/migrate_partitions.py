@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import os
+from typing import Dict, List
+
+from src.utils.partitions import SUPPORT_DOCS_PROPERTIES, PartitionRouter, support_docs_class
+from src.utils.weaviate_repository import AsyncWeaviateRepository, WeaviateError
+
+CATEGORIES = ["phone", "fibre", "broadband", "email"]
+
+
+async def ensure_class(repo: AsyncWeaviateRepository, class_schema: Dict) -> None:
+    try:
+        await repo.create_class(class_schema)
+        print(f"Created class {class_schema['class']}")
+    except WeaviateError as e:
+        if "already exists" not in str(e):
+            raise
+
+
+async def migrate(url: str, base_class: str, to: str, batch_size: int, dry_run: bool, delete_source: bool) -> None:
+    """Copy SupportDocs objects between shared and per-category storage
+
+    Objects keep their ids and vectors, so nothing is re-embedded.
+    """
+    repo = AsyncWeaviateRepository(url, headers={"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY", "")})
+    await repo.connect()
+    try:
+        partitions = PartitionRouter(base_class, mode="class", categories=CATEGORIES)
+        schema = await repo.get_schema()
+        partitions.discover(schema)
+        if to == "class":
+            sources = [base_class]
+            target_for = partitions.class_for
+        else:
+            sources = partitions.classes()
+            target_for = lambda category: base_class
+        sources = [source for source in sources if source in {c["class"] for c in schema.get("classes") or []}]
+        if not sources:
+            print("Nothing to migrate")
+            return
+
+        # Only select properties the source classes actually have (old ones may lack tokenCount)
+        known = {p["name"] for p in SUPPORT_DOCS_PROPERTIES}
+        source_properties = {
+            class_obj["class"]: [p["name"] for p in class_obj.get("properties") or [] if p["name"] in known]
+            for class_obj in schema.get("classes") or []
+        }
+        expected: Dict[str, int] = {}
+        pending: Dict[str, List[Dict]] = {}
+        schemas: Dict[str, Dict] = {}
+        created = set()
+
+        async def flush(class_name: str) -> None:
+            docs = pending.pop(class_name, [])
+            if not docs or dry_run:
+                return
+            if class_name not in created:
+                await ensure_class(repo, schemas[class_name])
+                created.add(class_name)
+            results = await repo.batch_create(
+                class_name,
+                [{k: v for k, v in doc.items() if k != "_additional" and v is not None} for doc in docs],
+                batch_size=batch_size,
+                vectors=[doc["_additional"].get("vector") for doc in docs],
+                ids=[doc["_additional"]["id"] for doc in docs],
+            )
+            failed = sum(1 for item in results if (item.get("result") or {}).get("errors"))
+            if failed:
+                print(f"{failed} objects failed to copy into {class_name}")
+
+        for source in sources:
+            async for doc in repo.iterate(source, source_properties.get(source, []), page_size=batch_size, additional=["id", "vector"]):
+                category = doc.get("category") or "unknown"
+                class_name = target_for(category)
+                if class_name not in schemas:
+                    schemas[class_name] = partitions.class_schema(category) if to == "class" else support_docs_class(class_name)
+                expected[class_name] = expected.get(class_name, 0) + 1
+                pending.setdefault(class_name, []).append(doc)
+                if len(pending[class_name]) >= batch_size:
+                    await flush(class_name)
+        for class_name in list(pending):
+            await flush(class_name)
+
+        ok = True
+        for class_name, count in sorted(expected.items()):
+            if dry_run:
+                print(f"{class_name}: {count} objects would be copied")
+                continue
+            actual = await repo.aggregate_count(class_name)
+            print(f"{class_name}: {actual}/{count} objects")
+            ok = ok and actual >= count
+
+        if dry_run:
+            return
+        if not ok:
+            print("Counts do not match; source data left in place")
+        elif delete_source:
+            for source in sources:
+                await repo.delete_class(source)
+                print(f"Deleted source class {source}")
+        else:
+            print(f"Done. Set STORAGE_MODE={to} and remove {', '.join(sources)} once verified")
+    finally:
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move SupportDocs between shared and per-category classes without re-embedding")
+    parser.add_argument("--url", default=os.getenv("WEAVIATE_URL", "http://localhost:8080"))
+    parser.add_argument("--base-class", default="SupportDocs")
+    parser.add_argument("--to", choices=["class", "shared"], default="class")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--delete-source", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.url, args.base_class, args.to, args.batch_size, args.dry_run, args.delete_source))
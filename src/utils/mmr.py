@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def mmr_select(vectors: np.ndarray, relevance: np.ndarray, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """Maximal marginal relevance over candidate vectors
+
+    Greedily picks the candidate maximising
+    lambda * relevance - (1 - lambda) * max cosine similarity to those already picked.
+    Returns candidate indices in selection order.
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = unit @ unit.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return selected
+
+
+def _relevance(candidates: List[Dict], query_vector: Optional[np.ndarray], vectors: np.ndarray) -> np.ndarray:
+    """Best available relevance signal, min-max scaled to [0, 1]"""
+    additional = [doc.get("_additional") or {} for doc in candidates]
+    if all(a.get("rerank_score") is not None for a in additional):
+        raw = np.asarray([a["rerank_score"] for a in additional], dtype=np.float32)
+    elif query_vector is not None:
+        q = query_vector / (np.linalg.norm(query_vector) or 1.0)
+        norms = np.linalg.norm(vectors, axis=1)
+        raw = vectors @ q / np.where(norms == 0, 1.0, norms)
+    elif all(a.get("distance") is not None for a in additional):
+        raw = 1 - np.asarray([a["distance"] for a in additional], dtype=np.float32)
+    else:
+        raw = 1.0 / np.arange(1, len(candidates) + 1, dtype=np.float32)
+
+    low, high = raw.min(), raw.max()
+    return (raw - low) / (high - low) if high > low else np.ones_like(raw)
+
+
+def apply_mmr(
+    candidates: List[Dict],
+    k: int,
+    lambda_mult: float = 0.7,
+    query_vector: Optional[List[float]] = None,
+) -> List[Dict]:
+    """Pick k diverse candidates using their `_additional.vector`
+
+    Candidates without vectors (e.g. local fallback hits) are returned in
+    their existing order.
+    """
+    vectors = [(doc.get("_additional") or {}).get("vector") for doc in candidates]
+    if len(candidates) <= 1 or any(v is None for v in vectors):
+        return candidates[:k]
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    q = np.asarray(query_vector, dtype=np.float32) if query_vector is not None else None
+    order = mmr_select(matrix, _relevance(candidates, q, matrix), k, lambda_mult)
+    return [candidates[i] for i in order]
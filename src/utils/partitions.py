@@ -0,0 +1,138 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils.doc_metadata import METADATA_PROPERTIES
+
+# Properties of every SupportDocs class, shared or per category
+SUPPORT_DOCS_PROPERTIES = [
+    {"name": "content", "dataType": ["text"], "description": "The document content"},
+    {"name": "metadata", "dataType": ["text"], "description": "Document metadata"},
+    {"name": "category", "dataType": ["text"], "description": "Document category"},
+    {"name": "originalMetadata", "dataType": ["text"], "description": "Original document metadata"},
+    {"name": "chunkIndex", "dataType": ["int"], "description": "Index of this chunk"},
+    {"name": "totalChunks", "dataType": ["int"], "description": "Total number of chunks"},
+    {"name": "tokenCount", "dataType": ["int"], "description": "Number of prompt tokens in the content"},
+    *METADATA_PROPERTIES,
+]
+
+STORAGE_MODES = ("shared", "class")
+
+# Description of per-category classes; marks them as partitions (and names
+# their category) so unrelated classes sharing the name prefix are left alone
+PARTITION_DESCRIPTION = "Support documentation partition for category: "
+
+
+def support_docs_class(class_name: str, description: str = "Support documentation with proper chunking") -> Dict[str, Any]:
+    """Schema for one SupportDocs class"""
+    return {
+        "class": class_name,
+        "description": description,
+        "vectorizer": "text2vec-openai",
+        "properties": [dict(p) for p in SUPPORT_DOCS_PROPERTIES],
+    }
+
+
+def category_filter(category: str) -> Dict[str, Any]:
+    return {"path": ["category"], "operator": "Equal", "valueString": category}
+
+
+def and_filters(*filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    present = []
+    for f in filters:
+        if f and f.get("operator") == "And":
+            present.extend(f["operands"])
+        elif f:
+            present.append(f)
+    if len(present) <= 1:
+        return present[0] if present else None
+    return {"operator": "And", "operands": present}
+
+
+class PartitionRouter:
+    """Maps categories to the Weaviate classes that store them
+
+    In "shared" mode everything lives in one class and categories become
+    `where` filters. In "class" mode each category has its own class (and
+    HNSW index), e.g. SupportDocsPhone, and searches only touch the classes
+    of the requested categories.
+    """
+
+    def __init__(self, base_class: str = "SupportDocs", mode: str = "shared", categories: Iterable[str] = ()):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode {mode!r}; expected one of {STORAGE_MODES}")
+        self.base_class = base_class
+        self.mode = mode
+        self.categories = list(dict.fromkeys(categories))
+        self._class_names: Dict[str, str] = {}
+        self._existing: Set[str] = set()
+
+    @property
+    def partitioned(self) -> bool:
+        return self.mode == "class"
+
+    def class_for(self, category: Optional[str]) -> str:
+        """Class holding `category` (the shared class in shared mode)"""
+        if not self.partitioned:
+            return self.base_class
+        if category in self._class_names:
+            return self._class_names[category]
+        suffix = "".join(part.capitalize() for part in re.split(r"[^A-Za-z0-9]+", category or "unknown") if part)
+        return self.base_class + (suffix or "Unknown")
+
+    def class_schema(self, category: Optional[str]) -> Dict[str, Any]:
+        """Schema for the class holding `category`, marked as its partition"""
+        class_name = self.class_for(category)
+        if not self.partitioned:
+            return support_docs_class(class_name)
+        return support_docs_class(class_name, description=f"{PARTITION_DESCRIPTION}{category or 'unknown'}")
+
+    def classes(self) -> List[str]:
+        """Every existing class a full scan has to visit"""
+        if not self.partitioned:
+            return [self.base_class]
+        return [name for name in map(self.class_for, self.categories) if name in self._existing]
+
+    def exists(self, class_name: str) -> bool:
+        return not self.partitioned or class_name in self._existing
+
+    def mark_created(self, category: str) -> None:
+        if category not in self.categories:
+            self.categories.append(category)
+        self._existing.add(self.class_for(category))
+
+    def forget(self) -> None:
+        """Partition classes were dropped, e.g. by /cleanup"""
+        self._existing.clear()
+
+    def discover(self, schema: Dict[str, Any]) -> None:
+        """Pick up partition classes that already exist, e.g. created by the migration tool
+
+        Only classes named for a known category, or marked as partitions in
+        their description, count; e.g. a SupportDocsBackup class is ignored.
+        """
+        if not self.partitioned:
+            return
+        known = {self.class_for(category): category for category in self.categories}
+        for class_obj in schema.get("classes") or []:
+            name = class_obj["class"]
+            description = class_obj.get("description") or ""
+            if name in known:
+                category = known[name]
+            elif name.startswith(self.base_class) and description.startswith(PARTITION_DESCRIPTION):
+                category = description[len(PARTITION_DESCRIPTION):]
+            else:
+                continue
+            self._class_names[category] = name
+            self.mark_created(category)
+
+    def targets(self, categories: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """(class name, where filter) pairs to search for the given categories (None = all)"""
+        if not self.partitioned:
+            if not categories:
+                return [(self.base_class, where)]
+            if len(categories) == 1:
+                return [(self.base_class, and_filters(category_filter(categories[0]), where))]
+            any_category = {"operator": "Or", "operands": [category_filter(c) for c in categories]}
+            return [(self.base_class, and_filters(any_category, where))]
+        names = map(self.class_for, categories or self.categories)
+        return [(name, where) for name in dict.fromkeys(names) if name in self._existing]
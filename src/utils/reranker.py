@@ -0,0 +1,140 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.synonyms import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """Re-scores retrieved candidates and keeps the best top_k"""
+
+    def __init__(self):
+        self.calls = 0
+        self.last_ms = 0.0
+
+    def score(self, query: str, candidates: List[Dict], query_vector: Optional[List[float]] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict],
+        top_k: int,
+        query_vector: Optional[List[float]] = None,
+    ) -> List[Dict]:
+        """Return the top_k candidates by score, annotated with `_additional.rerank_score`"""
+        if not candidates:
+            return []
+        start = time.perf_counter()
+        scores = self.score(query, candidates, query_vector)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        results = []
+        for i in order:
+            doc = candidates[i]
+            doc["_additional"] = {**(doc.get("_additional") or {}), "rerank_score": round(float(scores[i]), 6)}
+            results.append(doc)
+
+        self.calls += 1
+        self.last_ms = (time.perf_counter() - start) * 1000
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {"type": type(self).__name__, "calls": self.calls, "last_ms": round(self.last_ms, 3)}
+
+
+class FeatureReranker(Reranker):
+    """Linear blend of cheap lexical, semantic and retrieval-rank features
+
+    - lexical: fraction of query terms (and adjacent term pairs) found in the chunk
+    - semantic: cosine similarity of candidate and query vectors when both are
+      available, otherwise 1 - distance from the vector search
+    - prior: reciprocal of the candidate's original rank
+    """
+
+    def __init__(self, lexical_weight: float = 0.45, semantic_weight: float = 0.45, prior_weight: float = 0.1):
+        super().__init__()
+        self.weights = np.array([lexical_weight, semantic_weight, prior_weight], dtype=np.float32)
+
+    def features(self, query: str, candidates: List[Dict], query_vector: Optional[List[float]] = None) -> np.ndarray:
+        n = len(candidates)
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        query_pairs = list(zip(query_terms, query_terms[1:]))
+
+        # Presence matrix of query terms and pairs per candidate
+        lexical = np.zeros(n, dtype=np.float32)
+        if query_terms:
+            columns = len(query_terms) + len(query_pairs)
+            presence = np.zeros((n, columns), dtype=np.float32)
+            for row, doc in enumerate(candidates):
+                tokens = tokenize(doc.get("content") or "")
+                token_set = set(tokens)
+                pair_set = set(zip(tokens, tokens[1:]))
+                presence[row, :len(query_terms)] = [term in token_set for term in query_terms]
+                presence[row, len(query_terms):] = [pair in pair_set for pair in query_pairs]
+            lexical = presence.mean(axis=1)
+
+        semantic = np.zeros(n, dtype=np.float32)
+        vectors = [(doc.get("_additional") or {}).get("vector") for doc in candidates]
+        if query_vector is not None and all(v is not None for v in vectors):
+            matrix = np.asarray(vectors, dtype=np.float32)
+            q = np.asarray(query_vector, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0)
+            semantic = matrix @ q / np.where(norms == 0, 1.0, norms)
+        else:
+            distances = [(doc.get("_additional") or {}).get("distance") for doc in candidates]
+            semantic = np.asarray([1 - d if d is not None else 0.0 for d in distances], dtype=np.float32)
+
+        prior = 1.0 / np.arange(1, n + 1, dtype=np.float32)
+        return np.stack([lexical, semantic, prior], axis=1)
+
+    def score(self, query: str, candidates: List[Dict], query_vector: Optional[List[float]] = None) -> np.ndarray:
+        return self.features(query, candidates, query_vector) @ self.weights
+
+
+class OnnxCrossEncoderReranker(Reranker):
+    """Cross-encoder (e.g. an ms-marco MiniLM export) scored with onnxruntime on CPU
+
+    Needs the optional `onnxruntime` and `tokenizers` packages, an ONNX model
+    file and the matching tokenizer.json.
+    """
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_length: int = 256):
+        super().__init__()
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The ONNX reranker needs `pip install onnxruntime tokenizers`") from e
+
+        self.session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def score(self, query: str, candidates: List[Dict], query_vector: Optional[List[float]] = None) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch([(query, doc.get("content") or "") for doc in candidates])
+        inputs = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        return np.asarray(logits, dtype=np.float32).reshape(len(candidates), -1)[:, -1]
+
+
+def build_reranker(kind: str, model_path: Optional[str] = None, tokenizer_path: Optional[str] = None) -> Optional[Reranker]:
+    """Create the configured reranker; falls back to FeatureReranker if ONNX is unavailable"""
+    if kind == "none":
+        return None
+    if kind == "onnx":
+        try:
+            return OnnxCrossEncoderReranker(model_path, tokenizer_path)
+        except Exception as e:
+            logger.warning(f"ONNX reranker unavailable ({e}); using feature reranker")
+    return FeatureReranker()
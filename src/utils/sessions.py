@@ -0,0 +1,161 @@
+import asyncio
+import contextlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.utils.cache import TTLCache
+from src.utils.chat_history import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Words that usually point back at the previous answer ("what about that one?")
+FOLLOW_UP_WORDS = {"it", "its", "that", "this", "those", "these", "they", "them", "there", "also", "same", "else"}
+FOLLOW_UP_OPENERS = ("and ", "what about", "how about", "what if", "why", "then ")
+
+
+def is_follow_up(message: str, max_words: int = 8) -> bool:
+    """Short messages leaning on the previous turn, e.g. "and on the T48?" or "why is that?" """
+    text = message.lower().strip()
+    words = re.findall(r"[a-z0-9']+", text)
+    if not words or len(words) > max_words:
+        return False
+    return text.startswith(FOLLOW_UP_OPENERS) or any(word in FOLLOW_UP_WORDS for word in words)
+
+
+def query_similarity(a: Optional[Sequence[float]], b: Optional[Sequence[float]]) -> float:
+    """Cosine similarity of two query embeddings (0.0 if either is missing)"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    va, vb = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return float(va @ vb / ((np.linalg.norm(va) * np.linalg.norm(vb)) + 1e-12))
+
+
+@dataclass
+class Session:
+    session_id: Optional[str]  # None for clients that send their own chat_history
+    user_id: str
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    last_context: Optional[Dict[str, Any]] = None
+    last_category: Optional[str] = None
+    last_query_vector: Optional[List[float]] = None
+    # Messages already folded into the history summary, and those dropped from
+    # `messages` (with their chained fingerprint); both count from the start
+    summarised: int = 0
+    trimmed: int = 0
+    trimmed_fingerprint: str = ""
+    updated_at: float = field(default_factory=time.time)
+
+    def add_turn(self, message: str, answer: str, max_messages: int) -> None:
+        """Append a turn, dropping the oldest messages past max_messages
+
+        Only summarised messages are dropped, so the summary's prefix stays
+        intact; the history manager folds the tail long before the cap.
+        """
+        self.messages.extend([
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": answer},
+        ])
+        drop = min(len(self.messages) - max_messages, self.summarised - self.trimmed)
+        if drop > 0:
+            self.trimmed_fingerprint = fingerprint(self.messages[:drop], self.trimmed_fingerprint)
+            self.trimmed += drop
+            del self.messages[:drop]
+        self.updated_at = time.time()
+
+
+class SessionStore:
+    """Conversation sessions in an idle-expiring LRU, optionally persisted to SQLite
+
+    The SQLite file lets sessions survive restarts and be shared by workers
+    on one host; reads fall through to it on an in-memory miss.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 1800.0, max_messages: int = 100, db_path: Optional[str] = None):
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self.db_path = db_path
+        self._sessions = TTLCache(max_entries=max_sessions, ttl_seconds=idle_ttl)
+        self.created = 0
+        self.context_reuses = 0
+        if db_path:
+            with contextlib.closing(sqlite3.connect(db_path)) as db, db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions "
+                    "(session_id TEXT PRIMARY KEY, user_id TEXT, data TEXT, updated_at REAL)"
+                )
+
+    async def get_or_create(self, user_id: str, session_id: Optional[str] = None) -> Session:
+        """Existing session for session_id, or a fresh one with a new id
+
+        Without a session_id every call starts a new conversation; user_id is
+        never used as the key, since clients may share one.
+        """
+        key = session_id or str(uuid.uuid4())
+        session = self._sessions.get(key) if session_id else None
+        if session is None and session_id and self.db_path:
+            session = await asyncio.to_thread(self._load, key)
+        if session is None or session.user_id != user_id:
+            if session is not None:
+                # Never hand out another user's session
+                key = str(uuid.uuid4())
+            session = Session(session_id=key, user_id=user_id)
+            self.created += 1
+        self._sessions.set(session.session_id, session)
+        return session
+
+    async def save(self, session: Session) -> None:
+        self._sessions.set(session.session_id, session)
+        if self.db_path:
+            await asyncio.to_thread(self._store, session)
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.delete(session_id)
+        if self.db_path:
+            await asyncio.to_thread(self._delete, session_id)
+
+    def _connect(self):
+        return contextlib.closing(sqlite3.connect(self.db_path))
+
+    def _load(self, session_id: str) -> Optional[Session]:
+        with self._connect() as db, db:
+            row = db.execute("SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time() - self.idle_ttl:
+                db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                return None
+        return Session(**json.loads(row[0]))
+
+    def _store(self, session: Session) -> None:
+        with self._connect() as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, user_id, data, updated_at) VALUES (?, ?, ?, ?)",
+                (session.session_id, session.user_id, json.dumps(asdict(session)), session.updated_at),
+            )
+
+    def _delete(self, session_id: str) -> None:
+        with self._connect() as db, db:
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def prune(self) -> int:
+        """Drop idle sessions from SQLite; the LRU expires its own entries"""
+        if not self.db_path:
+            return 0
+        with self._connect() as db, db:
+            return db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.idle_ttl,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_memory": self._sessions.stats(),
+            "persistent": bool(self.db_path),
+            "created": self.created,
+            "context_reuses": self.context_reuses,
+        }
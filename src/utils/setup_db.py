@@ -2,16 +2,11 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-import weaviate
 import time
 from src.utils.document_processor import DocumentProcessor, Category
+from src.utils.weaviate_client import WeaviateClientManager
 
-def setup_database():
-    print("Connecting to Weaviate...")
-    client = weaviate.Client(
-        url="http://weaviate:8080"
-    )
-
+def setup_database(client):
     # Delete existing schema if it exists
     print("Cleaning up existing schema...")
     try:
@@ -266,7 +261,7 @@ def setup_database():
         }
     ]
 
-    processor = DocumentProcessor()
+    processor = DocumentProcessor(client=client)
     processor.batch_process_documents(test_docs)
 
     time.sleep(2)  # Wait for indexing
@@ -307,7 +302,7 @@ def setup_database():
     except Exception as e:
         print(f"Error verifying setup: {e}")
 
-def setup_test_docs():
+def setup_test_docs(client):
     test_docs = [
         # Previous documents remain...
 
@@ -1454,7 +1449,7 @@ def setup_test_docs():
         }
     ]
 
-    processor = DocumentProcessor()
+    processor = DocumentProcessor(client=client)
     processor.batch_process_documents(test_docs)
 
 def setup_schema(client):
@@ -1497,5 +1492,12 @@ def setup_schema(client):
     client.schema.create(schema)
 
 if __name__ == "__main__":
-    setup_database()
-    setup_test_docs() 
\ No newline at end of file
+    # One pooled client for the whole run
+    print("Connecting to Weaviate...")
+    manager = WeaviateClientManager(url="http://weaviate:8080")
+    try:
+        client = manager.connect()
+        setup_database(client)
+        setup_test_docs(client)
+    finally:
+        manager.close() 
\ No newline at end of file
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight task
+
+    The first caller starts the work; callers arriving before it finishes
+    await the same result (or exception). Nothing is kept afterwards, so this
+    complements rather than replaces the TTL caches.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        # A caller giving up (e.g. client disconnect) must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "collapse_ratio": round(self.collapsed / self.calls, 3) if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+        }
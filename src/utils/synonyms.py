@@ -0,0 +1,132 @@
+import json
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNONYMS_PATH = Path(__file__).parent.parent / "data" / "synonyms.json"
+
+# Keep short codes such as *72 and #31# intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9*#]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class Expansion:
+    query: str
+    terms: List[str]
+    matched: List[str] = field(default_factory=list)
+    elapsed_us: float = 0.0
+
+    @property
+    def synonyms(self) -> List[str]:
+        return self.terms[1:]
+
+
+class SynonymEngine:
+    """Word-level Aho-Corasick automaton over synonym phrases
+
+    Every phrase in the data file becomes a path of tokens in a trie; failure
+    links let a single left-to-right pass over the query find all phrase
+    occurrences, including overlapping multi-word ones.
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]], max_expansions: int = 6):
+        self.max_expansions = max_expansions
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, int]]] = [[]]
+        self._synonyms: Dict[str, List[str]] = {}
+
+        for phrase, alternatives in synonyms.items():
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            key = " ".join(tokens)
+            self._synonyms[key] = [alt for alt in alternatives if alt.lower() != key]
+            self._insert(tokens, key)
+        self._build_failure_links()
+
+        self.queries = 0
+        self.total_us = 0.0
+        self._recent_us = deque(maxlen=1000)
+
+    @classmethod
+    def from_file(cls, path: str = str(DEFAULT_SYNONYMS_PATH), max_expansions: int = 6) -> "SynonymEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            synonyms = json.load(f)
+        engine = cls(synonyms, max_expansions=max_expansions)
+        logger.info(f"Loaded {len(engine._synonyms)} synonym phrases from {path}")
+        return engine
+
+    def _insert(self, tokens: List[str], phrase: str) -> None:
+        node = 0
+        for token in tokens:
+            if token not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][token] = len(self._goto) - 1
+            node = self._goto[node][token]
+        self._output[node].append((phrase, len(tokens)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        """Return matched phrases, longest first"""
+        matches: Dict[str, int] = {}
+        node = 0
+        for token in tokenize(text):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for phrase, length in self._output[node]:
+                matches[phrase] = length
+        return sorted(matches, key=lambda phrase: -matches[phrase])
+
+    def expand(self, query: str) -> Expansion:
+        """Expand a query with synonyms for every phrase it contains, capped at max_expansions"""
+        start = time.perf_counter()
+        matched = self.find(query)
+        seen = {query.lower()} | set(tokenize(query)) | set(matched)
+        terms = [query]
+        for phrase in matched:
+            for alternative in self._synonyms[phrase]:
+                if len(terms) > self.max_expansions:
+                    break
+                if alternative.lower() not in seen:
+                    seen.add(alternative.lower())
+                    terms.append(alternative)
+
+        elapsed_us = (time.perf_counter() - start) * 1_000_000
+        self.queries += 1
+        self.total_us += elapsed_us
+        self._recent_us.append(elapsed_us)
+        return Expansion(query=query, terms=terms, matched=matched, elapsed_us=elapsed_us)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "phrases": len(self._synonyms),
+            "max_expansions": self.max_expansions,
+            "queries": self.queries,
+            "avg_us": round(self.total_us / self.queries, 1) if self.queries else 0.0,
+            "max_recent_us": round(max(self._recent_us), 1) if self._recent_us else 0.0,
+        }
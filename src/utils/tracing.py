@@ -0,0 +1,210 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, TypeVar
+
+from src.utils.log_config import DroppingQueueHandler
+
+T = TypeVar("T")
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+@dataclass
+class Trace:
+    request_id: str
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    spans: List[Span] = field(default_factory=list)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Total milliseconds per span name (a stage may run more than once)"""
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            if s.end_ns is not None:
+                totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'retrieval;dur=41.2, llm;dur=850.0, total;dur=902.3'"""
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self.stage_durations().items()]
+        entries.append(f"total;dur={((self.end_ns or time.time_ns()) - self.start_ns) / 1e6:.1f}")
+        return ", ".join(entries)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def start_trace(name: str, request_id: Optional[str] = None) -> Trace:
+    """Begin a trace for the current request; spans opened below it attach to it"""
+    trace = Trace(request_id=request_id or uuid.uuid4().hex, name=name)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time one stage of the current request; a no-op outside a trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    s = Span(
+        name=name,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+async def traced(name: str, awaitable: Awaitable[T], **attributes: Any) -> T:
+    """Await inside a span, e.g. for a stage handed to asyncio.gather"""
+    with span(name, **attributes):
+        return await awaitable
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request_id to log records (shown by the JSON formatter)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        return True
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    converted = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            converted.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            converted.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            converted.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            converted.append({"key": key, "value": {"stringValue": str(value)}})
+    return converted
+
+
+def to_otlp(trace: Trace, service_name: str = "rag-support") -> Dict[str, Any]:
+    """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+    root_id = trace.trace_id[:16]
+    spans = [{
+        "traceId": trace.trace_id,
+        "spanId": root_id,
+        "name": trace.name,
+        "kind": 2,  # SERVER
+        "startTimeUnixNano": str(trace.start_ns),
+        "endTimeUnixNano": str(trace.end_ns or time.time_ns()),
+        "attributes": _attributes({"request_id": trace.request_id}),
+    }]
+    for s in trace.spans:
+        spans.append({
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or root_id,
+            "name": s.name,
+            "kind": 1,  # INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+            "attributes": _attributes(s.attributes),
+        })
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": "src.utils.tracing"}, "spans": spans}],
+    }]}
+
+
+class _OtlpLine:
+    """Serialised on the exporter thread, not the request path"""
+
+    __slots__ = ("trace",)
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+
+    def __str__(self) -> str:
+        return json.dumps(to_otlp(self.trace))
+
+
+class TraceExporter:
+    """Writes finished traces as OTLP/JSON lines to stdout ("console") or a file
+
+    Lines go through a bounded queue drained by a background thread, so
+    exporting never blocks a request; the files can be replayed into an OTLP
+    collector.
+    """
+
+    def __init__(self, target: str = "console", sample_rate: float = 1.0, queue_size: int = 10000):
+        self.target = target
+        self.sample_rate = sample_rate
+        self.exported = 0
+        if target == "console":
+            handler: logging.Handler = logging.StreamHandler(sys.stdout)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            handler = logging.FileHandler(target)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        self._listener = logging.handlers.QueueListener(self._queue_handler.queue, handler)
+        self._listener.start()
+        self._logger = logging.getLogger("src.utils.tracing.export")
+        self._logger.propagate = False
+        self._logger.handlers = [self._queue_handler]
+        self._logger.setLevel(logging.INFO)
+
+    def export(self, trace: Trace) -> None:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.exported += 1
+        self._logger.info("%s", _OtlpLine(trace))
+
+    def close(self) -> None:
+        self._listener.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"target": self.target, "exported": self.exported, "dropped": self._queue_handler.dropped}
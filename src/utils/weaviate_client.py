@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Dict, Optional
+
+import weaviate
+from weaviate.config import Config, ConnectionConfig
+
+logger = logging.getLogger(__name__)
+
+
+class WeaviateClientManager:
+    """Owns one pooled Weaviate client (for the sync scripts) until close()"""
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        timeout: tuple = (5, 30),
+        startup_period: int = 30,
+    ):
+        self.url = url
+        self.headers = headers or {}
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.startup_period = startup_period
+        self._client: Optional[weaviate.Client] = None
+
+    def connect(self) -> weaviate.Client:
+        """Create the client and wait until Weaviate reports ready"""
+        if self._client is not None:
+            return self._client
+
+        start = time.perf_counter()
+        # The constructor blocks for up to startup_period seconds until
+        # /v1/.well-known/ready answers, which is our readiness check.
+        self._client = weaviate.Client(
+            url=self.url,
+            additional_headers=self.headers,
+            timeout_config=self.timeout,
+            startup_period=self.startup_period,
+            additional_config=Config(
+                connection_config=ConnectionConfig(
+                    session_pool_connections=self.pool_connections,
+                    session_pool_maxsize=self.pool_maxsize,
+                )
+            ),
+        )
+        logger.info(
+            f"Connected to Weaviate at {self.url} in {(time.perf_counter() - start) * 1000:.0f}ms "
+            f"(pool_connections={self.pool_connections}, pool_maxsize={self.pool_maxsize})"
+        )
+        return self._client
+
+    def close(self) -> None:
+        if self._client is None:
+            return
+        try:
+            self._client._connection.close()
+            logger.info("Closed Weaviate connection pool")
+        except Exception as e:
+            logger.warning(f"Error closing Weaviate client: {e}")
+        finally:
+            self._client = None
@@ -0,0 +1,344 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Any, List
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# GraphQL argument values that must be emitted as bare enum literals
+ENUM_KEYS = {"operator", "fusionType"}
+
+
+class WeaviateError(Exception):
+    """Raised when Weaviate returns an error response"""
+
+
+class GraphQLError(WeaviateError):
+    """Weaviate answered, but rejected (part of) a GraphQL query"""
+
+
+def to_graphql(value: Any, key: Optional[str] = None) -> str:
+    """Serialize a Python value into a GraphQL argument literal"""
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k}: {to_graphql(v, k)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(to_graphql(v, key) for v in value) + "]"
+    if key in ENUM_KEYS:
+        return str(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return json.dumps(str(value))
+
+
+def build_get_field(
+    class_name: str,
+    properties: List[str],
+    near_text: Optional[Dict] = None,
+    near_vector: Optional[Dict] = None,
+    bm25: Optional[Dict] = None,
+    where: Optional[Dict] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after: Optional[str] = None,
+    additional: Optional[List[str]] = None,
+    alias: Optional[str] = None,
+) -> str:
+    """Build a single `Get { Class(...) { ... } }` field"""
+    args = []
+    if near_text:
+        args.append(f"nearText: {to_graphql(near_text)}")
+    if near_vector:
+        args.append(f"nearVector: {to_graphql(near_vector)}")
+    if bm25:
+        args.append(f"bm25: {to_graphql(bm25)}")
+    if where:
+        args.append(f"where: {to_graphql(where)}")
+    if limit is not None:
+        args.append(f"limit: {int(limit)}")
+    if offset is not None:
+        args.append(f"offset: {int(offset)}")
+    if after:
+        args.append(f"after: {json.dumps(after)}")
+
+    fields = list(properties)
+    if additional:
+        fields.append("_additional { " + " ".join(additional) + " }")
+
+    head = f"{alias}: {class_name}" if alias else class_name
+    if args:
+        head += "(" + ", ".join(args) + ")"
+    return head + " { " + " ".join(fields) + " }"
+
+
+class AsyncWeaviateRepository:
+    """Non-blocking data access for Weaviate over GraphQL and REST"""
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self.url = url.rstrip("/")
+        self.headers = headers or {}
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    async def connect(self, startup_period: float = 30.0) -> None:
+        """Open the HTTP pool and wait until Weaviate reports ready"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+
+        start = time.perf_counter()
+        while True:
+            if await self.is_ready():
+                logger.info(f"Connected to Weaviate at {self.url} in {(time.perf_counter() - start) * 1000:.0f}ms")
+                return
+            if time.perf_counter() - start >= startup_period:
+                raise WeaviateError(f"Weaviate at {self.url} was not ready within {startup_period}s")
+            await asyncio.sleep(1)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            logger.info("Closed Weaviate connection pool")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            raise RuntimeError("Weaviate repository is not connected; call connect() first")
+        return self._http
+
+    async def is_ready(self) -> bool:
+        try:
+            response = await self.http.get("/v1/.well-known/ready")
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Report utilisation of the httpx connection pool"""
+        stats: Dict[str, Any] = {
+            "connected": self._http is not None,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+        if self._http is None:
+            return stats
+
+        try:
+            connections = self._http._transport._pool.connections
+            in_use = sum(1 for conn in connections if not conn.is_idle())
+            stats.update({
+                "open": len(connections),
+                "in_use": in_use,
+                "idle": len(connections) - in_use,
+                "utilisation": round(in_use / self.limits.max_connections, 3) if self.limits.max_connections else 0.0,
+            })
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+    def request_stats(self) -> Dict[str, int]:
+        """Requests sent, failed (HTTP or GraphQL errors) and timed out"""
+        return {"requests": self.requests, "errors": self.errors, "timeouts": self.timeouts}
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self.requests += 1
+        try:
+            response = await self.http.request(method, path, **kwargs)
+        except httpx.TimeoutException:
+            self.timeouts += 1
+            raise
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        if response.status_code >= 400:
+            self.errors += 1
+            raise WeaviateError(f"{method} {path} failed with {response.status_code}: {response.text}")
+        return response
+
+    # GraphQL
+
+    async def _graphql_payload(self, query: str) -> Dict[str, Any]:
+        response = await self._request("POST", "/v1/graphql", json={"query": query})
+        return response.json()
+
+    async def graphql(self, query: str) -> Dict[str, Any]:
+        """Run a raw GraphQL query and return its `data` section"""
+        payload = await self._graphql_payload(query)
+        if payload.get("errors"):
+            self.errors += 1
+            raise GraphQLError(f"GraphQL error: {payload['errors']}")
+        return payload.get("data") or {}
+
+    async def get(self, class_name: str, properties: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """Run a Get query; accepts the keyword arguments of build_get_field"""
+        data = await self.graphql("{ Get { " + build_get_field(class_name, properties, **kwargs) + " } }")
+        return (data.get("Get") or {}).get(class_name) or []
+
+    async def get_many(self, queries: List[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """Run several Get queries in one aliased GraphQL request
+
+        Each query is a dict of build_get_field arguments, including
+        class_name and properties. Results come back in the same order. With
+        return_exceptions, errors that Weaviate reports against one alias
+        (via `errors[].path`) come back as a WeaviateError in that query's
+        place; errors not tied to an alias still fail the whole request.
+        """
+        fields = [build_get_field(alias=f"q{i}", **query) for i, query in enumerate(queries)]
+        query = "{ Get { " + " ".join(fields) + " } }"
+        if not return_exceptions:
+            get = (await self.graphql(query)).get("Get") or {}
+            return [get.get(f"q{i}") or [] for i in range(len(queries))]
+
+        payload = await self._graphql_payload(query)
+        errors_by_alias: Dict[str, List[Dict[str, Any]]] = {}
+        for error in payload.get("errors") or []:
+            path = error.get("path") or []
+            if len(path) < 2 or path[0] != "Get":
+                self.errors += 1
+                raise GraphQLError(f"GraphQL error: {payload['errors']}")
+            errors_by_alias.setdefault(path[1], []).append(error)
+        if errors_by_alias:
+            self.errors += 1
+        get = (payload.get("data") or {}).get("Get") or {}
+        return [
+            GraphQLError(f"GraphQL error: {errors_by_alias[f'q{i}']}") if f"q{i}" in errors_by_alias else get.get(f"q{i}") or []
+            for i in range(len(queries))
+        ]
+
+    async def iterate(self, class_name: str, properties: List[str], page_size: int = 500, additional: Optional[List[str]] = None):
+        """Yield every object of a class using the cursor API"""
+        additional = list(additional or [])
+        if "id" not in additional:
+            additional.append("id")
+        after = None
+        while True:
+            page = await self.get(class_name, properties, limit=page_size, after=after, additional=additional)
+            for obj in page:
+                yield obj
+            if len(page) < page_size:
+                return
+            after = page[-1]["_additional"]["id"]
+
+    async def aggregate_count(self, class_name: str, where: Optional[Dict] = None) -> int:
+        args = f"(where: {to_graphql(where)})" if where else ""
+        data = await self.graphql("{ Aggregate { " + class_name + args + " { meta { count } } } }")
+        groups = (data.get("Aggregate") or {}).get(class_name) or [{}]
+        return groups[0].get("meta", {}).get("count", 0)
+
+    # Objects
+
+    async def create_object(
+        self,
+        class_name: str,
+        properties: Dict[str, Any],
+        uuid: Optional[str] = None,
+        vector: Optional[List[float]] = None,
+    ) -> str:
+        body: Dict[str, Any] = {"class": class_name, "properties": properties}
+        if uuid:
+            body["id"] = uuid
+        if vector is not None:
+            body["vector"] = vector
+        response = await self._request("POST", "/v1/objects", json=body)
+        return response.json()["id"]
+
+    async def get_object(self, class_name: str, uuid: str, include_vector: bool = False) -> Optional[Dict[str, Any]]:
+        params = {"include": "vector"} if include_vector else None
+        response = await self.http.get(f"/v1/objects/{class_name}/{uuid}", params=params)
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            raise WeaviateError(f"GET object {uuid} failed with {response.status_code}: {response.text}")
+        return response.json()
+
+    async def update_object(self, class_name: str, uuid: str, properties: Dict[str, Any], vector: Optional[List[float]] = None) -> None:
+        """Merge properties into an existing object
+
+        Weaviate re-vectorizes merged objects unless a vector is sent along.
+        """
+        body: Dict[str, Any] = {"class": class_name, "properties": properties}
+        if vector is not None:
+            body["vector"] = vector
+        await self._request("PATCH", f"/v1/objects/{class_name}/{uuid}", json=body)
+
+    async def delete_object(self, class_name: str, uuid: str) -> None:
+        await self._request("DELETE", f"/v1/objects/{class_name}/{uuid}")
+
+    # Batch
+
+    async def batch_create(
+        self,
+        class_name: str,
+        objects: List[Dict[str, Any]],
+        batch_size: int = 100,
+        vectors: Optional[List[Optional[List[float]]]] = None,
+        ids: Optional[List[Optional[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Create objects in batches (optionally with given vectors and ids); returns the per-object results"""
+        results = []
+        for start in range(0, len(objects), batch_size):
+            payload = []
+            for i, properties in enumerate(objects[start:start + batch_size], start):
+                obj: Dict[str, Any] = {"class": class_name, "properties": properties}
+                if vectors is not None and vectors[i] is not None:
+                    obj["vector"] = vectors[i]
+                if ids is not None and ids[i] is not None:
+                    obj["id"] = ids[i]
+                payload.append(obj)
+
+            response = await self._request("POST", "/v1/batch/objects", json={"objects": payload})
+            for item in response.json():
+                errors = (item.get("result") or {}).get("errors")
+                if errors:
+                    logger.warning(f"Batch object failed: {errors}")
+                results.append(item)
+        return results
+
+    async def delete_where(self, class_name: str, where: Dict[str, Any]) -> Dict[str, Any]:
+        """Delete every object matching a filter"""
+        response = await self._request(
+            "DELETE",
+            "/v1/batch/objects",
+            json={"match": {"class": class_name, "where": where}, "output": "minimal"},
+        )
+        return response.json()
+
+    # Schema
+
+    async def get_schema(self) -> Dict[str, Any]:
+        response = await self._request("GET", "/v1/schema")
+        return response.json()
+
+    async def create_class(self, class_obj: Dict[str, Any]) -> None:
+        await self._request("POST", "/v1/schema", json=class_obj)
+
+    async def add_property(self, class_name: str, property_obj: Dict[str, Any]) -> None:
+        await self._request("POST", f"/v1/schema/{class_name}/properties", json=property_obj)
+
+    async def delete_class(self, class_name: str) -> None:
+        await self._request("DELETE", f"/v1/schema/{class_name}")